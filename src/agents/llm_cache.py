@@ -0,0 +1,128 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Sequence
+
+from dotenv import load_dotenv
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from paths import CACHE_DIR
+
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("SMARTSCM_LLM_CACHE", "0") == "1"
+LLM_CACHE_PATH = os.getenv("SMARTSCM_LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_cache.sqlite"))
+LLM_CACHE_TTL = float(os.getenv("SMARTSCM_LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_MAX_BYTES = int(os.getenv("SMARTSCM_LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    On-disk LLM response cache.
+
+    Responses are keyed by a hash of the serialized model parameters (model name,
+    max_tokens, temperature, ...) and the full prompt/message list, so only
+    byte-identical requests are served from the cache. Entries older than `ttl`
+    seconds are ignored and the least recently used entries are evicted once the
+    stored responses exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: Optional[float] = LLM_CACHE_TTL, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl if ttl else None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        try:
+            return loads(row[0])
+        except Exception:
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        value = dumps(list(return_val))
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, len(value), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        if self.ttl is not None:
+            self.evictions += self._conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,)).rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed").fetchall():
+            if total - freed <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            freed += size
+            self.evictions += 1
+
+    def clear(self, **kwargs) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+            }
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[SQLiteLLMCache]:
+    """Returns the process-wide response cache, or None unless SMARTSCM_LLM_CACHE=1."""
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = SQLiteLLMCache()
+    return _llm_cache
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+from langchain_openai.chat_models.base import BaseChatOpenAI
+
+from agents.llm_cache import get_llm_cache
+
+load_dotenv()
+
+DEFAULT_MODEL = "deepseek-chat"
+DEFAULT_BASE_URL = "https://api.deepseek.com"
+
+# Connection pool shared by every client of the process
+POOL_SIZE = int(os.getenv("SMARTSCM_LLM_POOL_SIZE", 64))
+KEEPALIVE_CONNECTIONS = int(os.getenv("SMARTSCM_LLM_KEEPALIVE_CONNECTIONS", 32))
+KEEPALIVE_EXPIRY = float(os.getenv("SMARTSCM_LLM_KEEPALIVE_EXPIRY", 60))
+CONNECT_TIMEOUT = float(os.getenv("SMARTSCM_LLM_CONNECT_TIMEOUT", 10))
+READ_TIMEOUT = float(os.getenv("SMARTSCM_LLM_READ_TIMEOUT", 120))
+
+_http_client = None
+_http_async_client = None
+_clients = {}
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=POOL_SIZE,
+        max_keepalive_connections=KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def get_http_client() -> httpx.Client:
+    """Returns the keep-alive HTTP connection pool shared by all LLM clients."""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+    return _http_client
+
+
+def get_http_async_client() -> httpx.AsyncClient:
+    """
+    Returns the async counterpart of `get_http_client`, used by `ainvoke` (e.g. under
+    `aorchestrate`), with the same pool size, keep-alive and timeouts. Its connections
+    belong to the event loop that opened them, so it is meant for one loop at a time,
+    like the benchmark's async mode.
+    """
+    global _http_async_client
+    if _http_async_client is None:
+        with _lock:
+            if _http_async_client is None:
+                _http_async_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+    return _http_async_client
+
+
+def get_llm(max_tokens: int, model: str = DEFAULT_MODEL, base_url: str = DEFAULT_BASE_URL) -> BaseChatOpenAI:
+    """
+    Returns the long-lived chat client for (model, base URL, max_tokens).
+
+    Clients are created once per key and all of them send their requests through the
+    same connection pool, so agents and threads reuse open TLS connections instead of
+    building a client and handshaking for every tool call.
+    """
+    key = (model, base_url, max_tokens)
+    if key not in _clients:
+        http_client = get_http_client()
+        http_async_client = get_http_async_client()
+        with _lock:
+            if key not in _clients:
+                _clients[key] = BaseChatOpenAI(
+                    model=model,
+                    openai_api_key=os.getenv("DEEPSEEK_API_KEY"),
+                    openai_api_base=base_url,
+                    max_tokens=max_tokens,
+                    request_timeout=_timeout(),
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                    # None keeps the default behaviour when the response cache is off
+                    cache=get_llm_cache(),
+                )
+    return _clients[key]
@@ -44,6 +44,9 @@ class LogStreamingCallbackHandler(BaseCallbackHandler):
 
 import os
 import sys
+import uuid
+import asyncio
+from typing import Optional
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 import pandas as pd
@@ -51,20 +54,23 @@ from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
 from langchain.agents import  initialize_agent, AgentType
-from langchain.prompts import PromptTemplate
 from langchain.output_parsers import OutputFixingParser
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_openai.chat_models.base import BaseChatOpenAI
 from langchain_groq import ChatGroq
 
 from tools.data_loader_tool import DataLoadingTool
 from tools.data_vizualization_tool import DataVisualizationTool, OneInputSchema
 from tools.pandas_tool import PandasTool
 from tools.plan_validation_tool import PlanValidationTool
-from memory.short_term_memory import agent_short_term_memory
+from memory.short_term_memory import get_session_memory
+from memory.data_context import DataContext
+from memory.result_registry import ResultRegistry
+from agents.llm_factory import get_llm
+from agents.prompt_builder import COMPACT_PROMPT, PROMPT_TOKEN_BUDGET, get_prompt_builder
 
 load_dotenv()
 
+ORCHESTRATE_TIMEOUT = float(os.getenv("SMARTSCM_ORCHESTRATE_TIMEOUT", 0)) or None
 
 # ---- Output Schema ----
 class OrchestratorOutput(BaseModel):
@@ -74,25 +80,28 @@ class OrchestratorOutput(BaseModel):
     )
     plan: str = Field(..., description="The plan / steps to follow to do the task")
 
-input_schema: str = JsonOutputParser(
-    pydantic_object=OneInputSchema
-).get_format_instructions()
-
 # ---- Orchestrator Class ----
 class LLMOrchestrator:
-    def __init__(self, step_callback=None, verbose=False, variant: str = "default", disable_callbacks: bool = False):
-        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.run_id = run_id  # Save run_id for later use
+    def __init__(self, step_callback=None, verbose=False, variant: str = "default", disable_callbacks: bool = False, session_id: Optional[str] = None,
+                 compact_prompt: bool = COMPACT_PROMPT, prompt_token_budget: Optional[int] = PROMPT_TOKEN_BUDGET):
+        self.run_id = self._new_run_id()  # Save run_id for later use
+        # Conversation memory is scoped to the session; each orchestrator gets its own by default
+        self.session_id = session_id or str(uuid.uuid4())
         self.verbose = verbose
         self.variant = variant
         self.disable_callbacks = disable_callbacks
+        self.compact_prompt = compact_prompt
+        self.prompt_token_budget = prompt_token_budget
+        self.last_prompt_tokens = None
         self._log_steps = []
         self._log_dir = LOGS_DIR
+        self._ui_handler = None
         if not self.disable_callbacks:
             if step_callback:
                 handler = UIStreamingCallbackHandler(step_callback)
                 callback_manager = BaseCallbackManager(handlers=[handler])
                 self._step_callback = step_callback
+                self._ui_handler = handler
                 self.log_step_callback = None  # No log_step_callback in this case
             else:
                 os.makedirs(self._log_dir, exist_ok=True)
@@ -105,15 +114,11 @@ class LLMOrchestrator:
             self._step_callback = None
             self.log_step_callback = None
 
-        self.df = None
+        self.data = DataContext()
+        self.results = ResultRegistry()
         self.current_problem = None
 
-        self.llm = BaseChatOpenAI(
-            model="deepseek-chat",
-            openai_api_key=os.getenv("DEEPSEEK_API_KEY"),
-            openai_api_base="https://api.deepseek.com",
-            max_tokens=2048,
-        )
+        self.llm = get_llm(max_tokens=2048)
  
         self.output_parser = JsonOutputParser(pydantic_object=OrchestratorOutput)
         self.tools = self.create_tools()
@@ -122,7 +127,7 @@ class LLMOrchestrator:
             llm=self.llm,
             agent_type=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
             handle_parsing_errors=True,
-            memory=agent_short_term_memory,
+            memory=get_session_memory(self.session_id, llm=self.llm),
             verbose=verbose,
             callback_manager=callback_manager,
         )
@@ -145,111 +150,133 @@ class LLMOrchestrator:
         log_data = {
             "input": self.current_problem,
             "output": make_serializable(getattr(self, "last_output", None)),
+            "prompt_tokens": self.last_prompt_tokens,
             "steps": make_serializable(self._log_steps),
         }
         with open(log_path, "w", encoding="utf-8") as f:
             json.dump(log_data, f, ensure_ascii=False, indent=2)
 
+    @staticmethod
+    def _new_run_id() -> str:
+        # Microseconds keep the log files of runs started within the same second apart
+        return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+    def _start_run(self, problem: str):
+        """Starts the log of a new question: the orchestrator lives for the whole session."""
+        self.run_id = self._new_run_id()
+        # Cleared in place, the log callback handler holds this list
+        self._log_steps.clear()
+        self.last_output = None
+        self.current_problem = problem
+
     # You should call this at the end of the run if step_callback was not provided
     def orchestrate(self, problem: str, prefix_prompt: str = ""):
-        self.current_problem = problem
+        self._start_run(problem)
         prompt = self.build_prompt(problem, prefix_prompt=prefix_prompt)
         raw_response = self.agent.run(prompt)
         fixed_parser = OutputFixingParser.from_llm(
             parser=self.output_parser, llm=self.llm
         )
-        parsed = fixed_parser.parse(raw_response)
+        parsed = self.render_results(fixed_parser.parse(raw_response))
         self.last_output = parsed  # Store output for logging
         if not self.disable_callbacks and (self.log_step_callback is not None):
             self.save_log()
         return parsed
 
+    async def aorchestrate(self, problem: str, prefix_prompt: str = "", timeout: Optional[float] = ORCHESTRATE_TIMEOUT):
+        """
+        Asynchronous version of `orchestrate`. LLM calls use the async client, while data
+        loading and chart rendering run in the default executor, so one event loop can
+        serve many questions at once.
+
+        Cancelling the returned coroutine, or exceeding `timeout` seconds, stops the agent
+        at its next await; a tool already running in the executor finishes in the
+        background and its result is dropped.
+
+        Raises:
+            asyncio.TimeoutError: If the run takes longer than `timeout`.
+        """
+        self._start_run(problem)
+        prompt = self.build_prompt(problem, prefix_prompt=prefix_prompt)
+
+        async def run():
+            raw_response = await self.agent.arun(prompt)
+            fixed_parser = OutputFixingParser.from_llm(
+                parser=self.output_parser, llm=self.llm
+            )
+            return await fixed_parser.aparse(raw_response)
+
+        parsed = self.render_results(await asyncio.wait_for(run(), timeout=timeout))
+        self.last_output = parsed  # Store output for logging
+        if not self.disable_callbacks and (self.log_step_callback is not None):
+            self.save_log()
+        return parsed
+
+    def set_step_callback(self, step_callback):
+        """
+        Points the UI callback handler at a new step callback, so a long-lived orchestrator
+        can report the steps of each request to that request's placeholders.
+        """
+        if self._ui_handler is None:
+            raise ValueError("This orchestrator was created without a step_callback.")
+        self._ui_handler.step_callback = step_callback
+        self._step_callback = step_callback
+
+    def log_event(self, event: dict):
+        """Records a tool event (e.g. a validation cache hit) in the run log."""
+        self._log_steps.append(event)
+
     def set_df(self, df: pd.DataFrame):
-        self.df = df
+        # The data loader already stored the frame and its source in the context
+        if not self.data.holds(df):
+            self.data.set(df)
 
     def get_df(self) -> pd.DataFrame:
-        return self.df
+        return self.data.view()
+
+    def render_results(self, parsed):
+        """Replaces the `{{table:name}}` placeholders of the final output with the published results."""
+        if isinstance(parsed, dict) and isinstance(parsed.get("output"), str):
+            parsed["output"] = self.results.render(parsed["output"])
+        return parsed
+
+    def resolve_source(self, name: str):
+        """
+        Finds a frame referenced by a tool input: a published result, `df`, `df_daily_agg`,
+        or a pandas agent variable.
+        """
+        published = self.results.get(name)
+        if published is not None:
+            return published
+        if name == "df":
+            return self.get_df()
+        if name == "df_daily_agg":
+            return self.data.aggregates
+        for tool in self.tools:
+            if isinstance(tool, PandasTool):
+                return tool.lookup(name)
+        return None
 
     def create_tools(self):
         return [
-            PandasTool(self.get_df,verbose=self.verbose,variant=self.variant),
-            DataLoadingTool(self.set_df),
-            DataVisualizationTool(),
+            PandasTool(self.get_df,verbose=self.verbose,variant=self.variant,context=self.data,results=self.results),
+            DataLoadingTool(self.set_df, context=self.data),
+            DataVisualizationTool(resolve_source=self.resolve_source),
             PlanValidationTool(
                 get_problem=lambda: self.current_problem,
                 get_tools=lambda: self.tools,
+                on_event=self.log_event,
             ),
         ]
 
     def build_prompt(self, problem: str,prefix_prompt:str="") -> str:
-        start_date = "2024-12-01"
-        end_date = "2025-05-20"
-        template = PromptTemplate(
-            input_variables=["problem","prefix_prompt"],
-            partial_variables={
-                "output_format": self.output_parser.get_format_instructions(),
-                "tools": "\n".join(
-                    [f"- {tool.name}: {tool.description}" for tool in self.tools]
-                ),
-                "input_schema": input_schema,
-                "start_date": start_date,
-                "end_date": end_date,
-            },
-            template="""
-                You are an intelligent assistant that can perform two things:
-
-                    1. Help users with **supply chain data analysis**, using the available tools.
-
-                Use the tools when appropriate, and keep conversations natural and helpful.
-
-                ---
-
-                ## Data available :
-                you have access to data from {start_date} to {end_date}.
-
-                ---
-
-                ## 🛠️ Tool Details
-
-                {tools}
-                **DataVisualizationTool** expects input in the following format:  
-                {input_schema}
-
-                ---
-
-                ## 🎯 Task
-
-                **{problem}**
-
-                ---
-
-                ## ✅ Instructions (for data analysis tasks)
-
-                1. **Understand the Problem**  
-                Ask clarifying questions if needed. Identify the key goals, relevant data, and any constraints.
-
-                2. **Validate the Plan**  
-                Summarize the plan for the user to confirm before proceeding.
-
-                3. **Execute the Plan**  
-                Perform the steps using the appropriate tools.  
-                Share progress and results clearly with the user.
-
-                4. **Format the Output**  
-                Make sure your Markdown output is clear, well-organized, and visually appealing. Use headings, lists, tables, and emphasis to improve readability.
-
-                ---
-
-                ## 📤 Output Format
-
-                {output_format}
-
-                ---
-
-                ## Extra Instructions:
-                {prefix_prompt}
-            """,
+        builder = get_prompt_builder(self.tools, OrchestratorOutput, OneInputSchema)
+        prompt, tokens, level = builder.build(
+            problem,
+            prefix_prompt=prefix_prompt,
+            compact=self.compact_prompt,
+            token_budget=self.prompt_token_budget,
         )
-        prompt = template.format(problem=problem,prefix_prompt=prefix_prompt)
+        self.last_prompt_tokens = tokens
+        self.log_event({"event": "prompt", "tokens": tokens, "compaction_level": level})
         return prompt
-
@@ -1,7 +1,7 @@
 from langchain_experimental.agents import create_pandas_dataframe_agent as create_default_agent
 from langchain.agents.agent_types import AgentType
 import pandas as pd
-from langchain_openai.chat_models.base import BaseChatOpenAI
+from agents.llm_factory import get_llm
 from dotenv import load_dotenv
 import os
 from langchain_groq import ChatGroq
@@ -55,6 +55,9 @@ from langchain_core.utils.interactive_env import is_interactive_env
 from langchain_experimental.tools.python.tool import PythonAstREPLTool
 
 from tools.rag_tool import RAGTool
+from tools.aggregate_cube import CUBE_DESCRIPTION
+from tools.columnar_store import handoff
+from memory.result_registry import PUBLISH_DESCRIPTION, ResultRegistry
 
 
 def _get_single_prompt(
@@ -171,22 +174,33 @@ class PandasAgent:
     This class interacts with an LLM and a Pandas DataFrame to perform operations.
     """
 
-    def __init__(self, df: pd.DataFrame,variant:str="default", verbose: bool = False):
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        variant: str = "default",
+        verbose: bool = False,
+        aggregates: Optional[pd.DataFrame] = None,
+        results: Optional[ResultRegistry] = None,
+    ):
         """
         Initializes the PandasAgent with the given DataFrame using DeepSeek Chat model.
 
         Args:
             df (pd.DataFrame): The DataFrame to work with.
+            aggregates (pd.DataFrame): Daily rollups of `df`, preloaded in the REPL as `df_daily_agg`.
+            results (ResultRegistry): Session results, published from the REPL with `publish(name, result)`.
         """
         self.df = df
-        self.llm = BaseChatOpenAI(
-            model="deepseek-chat",
-            openai_api_key=os.getenv("DEEPSEEK_API_KEY"),
-            openai_api_base="https://api.deepseek.com",
-            max_tokens=8192,
-        )
+        self.llm = get_llm(max_tokens=8192)
 
         self.agent = self._create_agent(verbose=verbose,variant=variant)
+        repl = self._repl()
+        self.aggregates = aggregates if aggregates is not None and not aggregates.empty else None
+        self.has_aggregates = self.aggregates is not None and repl is not None
+        self._bind_frames()
+        self.can_publish = results is not None and repl is not None
+        if self.can_publish:
+            repl.locals["publish"] = results.publish
 
     def _create_agent(self, variant: str = "default", verbose: bool = False):
         """
@@ -233,6 +247,62 @@ class PandasAgent:
             agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
         )
 
+    def _repl(self) -> Optional[PythonAstREPLTool]:
+        return next((tool for tool in self.agent.tools if isinstance(tool, PythonAstREPLTool)), None)
+
+    def _bind_frames(self):
+        """
+        Rebinds `df` (and `df_daily_agg`) in the REPL to fresh copies of the loaded data.
+
+        Only the other intermediates are kept across sub-questions: code of an earlier step
+        that filtered, reassigned or modified `df` in place must not change what the next
+        steps analyze.
+        """
+        repl = self._repl()
+        if repl is None:
+            return
+        repl.locals["df"] = handoff(self.df)
+        if self.has_aggregates:
+            repl.locals["df_daily_agg"] = handoff(self.aggregates)
+
+    def repl_variables(self) -> Dict[str, str]:
+        """
+        Variables left in the REPL by earlier queries, e.g. {"daily": "DataFrame (31 x 3)"}.
+
+        The REPL namespace lives as long as the agent, so intermediates computed for one
+        sub-question can be reused by the next ones. `df` and `df_daily_agg` are not listed:
+        they are reset to the loaded data before every query.
+        """
+        repl = self._repl()
+        if repl is None:
+            return {}
+        variables = {}
+        for name, value in repl.locals.items():
+            if name in ("df", "df_daily_agg") or name.startswith("_") or callable(value) or type(value).__name__ == "module":
+                continue
+            if isinstance(value, (pd.DataFrame, pd.Series)):
+                variables[name] = f"{type(value).__name__} {value.shape}"
+            else:
+                variables[name] = type(value).__name__
+        return variables
+
+    def lookup(self, name: str):
+        """Returns the DataFrame or Series called `name` in the REPL, or None."""
+        repl = self._repl()
+        value = repl.locals.get(name) if repl is not None else None
+        return value if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+    def _with_variables(self, query: str) -> str:
+        if self.has_aggregates:
+            query = f"{query}\n\n{CUBE_DESCRIPTION}"
+        if self.can_publish:
+            query = f"{query}\n\n{PUBLISH_DESCRIPTION}"
+        variables = self.repl_variables()
+        if not variables:
+            return query
+        listing = ", ".join(f"`{name}` ({kind})" for name, kind in variables.items())
+        return f"{query}\n\nVariables computed by previous steps, still defined in the python REPL: {listing}."
+
     def invoke(self, query: str):
         """
         Invokes the agent with the given query and returns the result.
@@ -243,5 +313,19 @@ class PandasAgent:
         Returns:
             The result of the query execution.
         """
-        return self.agent.invoke(query)
+        self._bind_frames()
+        return self.agent.invoke(self._with_variables(query))
 
+    async def ainvoke(self, query: str):
+        """
+        Asynchronous version of `invoke`: LLM calls go through the async client and the
+        REPL code runs in an executor.
+
+        Args:
+            query (str): The query to execute on the DataFrame.
+
+        Returns:
+            The result of the query execution.
+        """
+        self._bind_frames()
+        return await self.agent.ainvoke(self._with_variables(query))
@@ -0,0 +1,147 @@
+import re
+import difflib
+import threading
+from typing import List, Optional
+
+# A new step starts at "1.", "2)", "Step 3:", "- " or "* " at the beginning of a line
+STEP_MARKER = re.compile(r"^\s*(?:\*\*)?(?:step\s*)?\d+\s*[\.\):\-]\s*(?:\*\*)?|^\s*[-*•]\s+", re.IGNORECASE)
+# Tool-like references: CamelCase names ending in "Tool", and snake_case words next to "tool"
+TOOL_REFERENCE = re.compile(
+    r"\b([A-Za-z][A-Za-z0-9]*Tool)\b"
+    r"|\b([a-z][a-z0-9]*(?:_[a-z0-9]+)+)[`'\"]?\s+tool\b"
+    r"|\btool\s+[`'\"]?([a-z][a-z0-9]*(?:_[a-z0-9]+)+)\b",
+    re.IGNORECASE,
+)
+LOADING_WORDS = re.compile(r"\b(load|loads|loading|loaded|fetch|retrieve|read|access|import)\b", re.IGNORECASE)
+LOADING_TOOLS = {"dataloader", "dataloading"}
+# Tools the plans mention that run inside other tools (the pandas agent's REPL and documentation search)
+INTERNAL_TOOLS = ["python_repl_ast", "PythonAstREPLTool", "RAGTool"]
+# How close a reference must be to a known name (after normalization) to count as that tool
+MATCH_CUTOFF = 0.8
+
+# Counters reported by the benchmark, see validation_stats()
+_stats = {"rule_rejections": 0, "llm_calls": 0, "llm_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def split_plan_steps(plan: str) -> List[str]:
+    """Splits a plan into steps on numbered/bulleted lines, or one step per line if there are none."""
+    lines = [line for line in plan.splitlines() if line.strip()]
+    if not any(STEP_MARKER.match(line) for line in lines):
+        return [line.strip() for line in lines]
+    steps = []
+    for line in lines:
+        if STEP_MARKER.match(line) or not steps:
+            steps.append(STEP_MARKER.sub("", line, count=1).strip())
+        else:
+            steps[-1] += " " + line.strip()
+    return steps
+
+
+def referenced_tools(text: str) -> List[str]:
+    return [next(group for group in match.groups() if group) for match in TOOL_REFERENCE.finditer(text)]
+
+
+def _normalize(name: str) -> str:
+    # "DataVisualizationTool", "data_vizualization" and "data visualization tool" compare alike
+    name = re.sub(r"[^a-z0-9]", "", name.lower())
+    return name[: -len("tool")] if name.endswith("tool") and len(name) > len("tool") else name
+
+
+def _known_names(tools) -> dict:
+    """Normalized names and aliases of the tools, mapped to the tool name."""
+    # The prompts also call tools by their class name (e.g. DataVisualizationTool)
+    names = {}
+    for tool in tools:
+        names[_normalize(tool.name)] = tool.name
+        names[_normalize(type(tool).__name__)] = tool.name
+    for name in INTERNAL_TOOLS:
+        names.setdefault(_normalize(name), name)
+    return names
+
+
+def resolve_tool(reference: str, known: dict):
+    """Returns the normalized known name `reference` fuzzy-matches, or None."""
+    normalized = _normalize(reference)
+    if normalized in known:
+        return normalized
+    matches = difflib.get_close_matches(normalized, list(known), n=1, cutoff=MATCH_CUTOFF)
+    return matches[0] if matches else None
+
+
+def _is_tool_class(reference: str) -> bool:
+    # Only CamelCase "...Tool" names are certainly meant as tools; a snake_case word next to
+    # "tool" may just as well be a column (e.g. "the order_date tool")
+    return reference[:1].isupper() and reference.endswith("Tool")
+
+
+def prevalidate(plan: str, tools) -> Optional[dict]:
+    """
+    Checks the constraints that do not need a model:
+
+    - C1: the first step must load or access the data before any other tool is used.
+    - C5: every tool the plan references must be one of `tools`. Only CamelCase tool
+      names that fuzzy-match no known tool name or alias are flagged; anything
+      ambiguous is left to the LLM validator.
+
+    Returns:
+        dict: A validator output ({"valid": False, "comment": ..., "violations": [...]})
+        when a rule is broken, or None when the plan must go to the LLM validator.
+    """
+    steps = split_plan_steps(plan)
+    if not steps:
+        return None
+    known = _known_names(tools)
+    violations = []
+
+    for index, step in enumerate(steps, 1):
+        for reference in referenced_tools(step):
+            if _is_tool_class(reference) and resolve_tool(reference, known) is None:
+                violations.append({
+                    "constraint": "C5",
+                    "step": index,
+                    "detail": f"Step {index} references `{reference}`, which is not one of the available tools.",
+                })
+
+    first_references = sorted(
+        {reference for reference in referenced_tools(steps[0]) if resolve_tool(reference, known) is not None}
+    )
+    loads_first = (
+        any(resolve_tool(reference, known) in LOADING_TOOLS for reference in first_references)
+        or "data_loader" in steps[0].lower()
+        or bool(LOADING_WORDS.search(steps[0]))
+    )
+    if first_references and not loads_first:
+        violations.insert(0, {
+            "constraint": "C1",
+            "step": 1,
+            "detail": "The first step uses "
+            + ", ".join(f"`{name}`" for name in first_references)
+            + " before the data is loaded; the first step must load the data (e.g. with `data_loader`).",
+        })
+
+    if not violations:
+        return None
+    with _stats_lock:
+        _stats["rule_rejections"] += 1
+    return {
+        "valid": False,
+        "comment": "\n".join(f"- {v['constraint']}: {v['detail']}" for v in violations),
+        "violations": violations,
+    }
+
+
+def record_llm_call(seconds: float):
+    with _stats_lock:
+        _stats["llm_calls"] += 1
+        _stats["llm_seconds"] += seconds
+
+
+def validation_stats() -> dict:
+    """LLM validations made and skipped by the rules, with the latency saved by the skips."""
+    with _stats_lock:
+        stats = dict(_stats)
+    average = stats["llm_seconds"] / stats["llm_calls"] if stats["llm_calls"] else 0.0
+    stats["avg_llm_seconds"] = average
+    stats["estimated_seconds_saved"] = stats["rule_rejections"] * average
+    return stats
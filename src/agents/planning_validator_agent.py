@@ -6,9 +6,12 @@ from langchain.output_parsers import OutputFixingParser
 from pydantic import BaseModel, Field
 from langchain_core.output_parsers import JsonOutputParser
 from langchain.output_parsers import OutputFixingParser
-from langchain_openai.chat_models.base import BaseChatOpenAI
+from agents.llm_factory import get_llm
+from agents.plan_rules import prevalidate, record_llm_call
 from dotenv import load_dotenv
 import os
+import time
+import threading
 from langchain_groq import ChatGroq
 
 load_dotenv()
@@ -21,12 +24,7 @@ class Output(BaseModel):
 class PlanValidatorAgent:
     def __init__(self):
         self.parser = JsonOutputParser(pydantic_object=Output)
-        self.validator_llm = BaseChatOpenAI(
-            model="deepseek-chat",
-            openai_api_key=os.getenv("DEEPSEEK_API_KEY"),
-            openai_api_base="https://api.deepseek.com",
-            max_tokens=2 * 1024,
-        )
+        self.validator_llm = get_llm(max_tokens=2 * 1024)
        
         self.output_parser = OutputFixingParser.from_llm(
             parser=self.parser, llm=self.validator_llm
@@ -86,10 +84,16 @@ class PlanValidatorAgent:
         )
 
     def validate(self, problem, plan,tools):
+        # C1 and C5 are checked mechanically; only plans passing them cost an LLM call
+        rejection = prevalidate(plan, tools)
+        if rejection is not None:
+            return rejection
+
         tools_description = "\n".join(
             [f"- {t.name}: {t.description}" for t in tools]
         )
 
+        started = time.perf_counter()
         response = self.validator_chain.run(
             {
                 "problem": problem,
@@ -98,5 +102,42 @@ class PlanValidatorAgent:
                 "plan": plan,
             }
         )
+        output = self.output_parser.parse(response)
+        record_llm_call(time.perf_counter() - started)
+        return output
+
+    async def avalidate(self, problem, plan, tools):
+        rejection = prevalidate(plan, tools)
+        if rejection is not None:
+            return rejection
+
+        tools_description = "\n".join(
+            [f"- {t.name}: {t.description}" for t in tools]
+        )
+
+        started = time.perf_counter()
+        response = await self.validator_chain.arun(
+            {
+                "problem": problem,
+                "data_description": self.data_description,
+                "tools": tools_description,
+                "plan": plan,
+            }
+        )
+        output = await self.output_parser.aparse(response)
+        record_llm_call(time.perf_counter() - started)
+        return output
+
+
+_validator = None
+_validator_lock = threading.Lock()
+
 
-        return self.output_parser.parse(response)
+def get_plan_validator() -> PlanValidatorAgent:
+    """Returns the process-wide validator; it holds no per-plan state, so threads share it."""
+    global _validator
+    if _validator is None:
+        with _validator_lock:
+            if _validator is None:
+                _validator = PlanValidatorAgent()
+    return _validator
@@ -0,0 +1,174 @@
+import json
+import os
+import textwrap
+import threading
+from typing import Optional, Tuple
+
+from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+DATA_START_DATE = "2024-12-01"
+DATA_END_DATE = "2025-05-20"
+COMPACT_PROMPT = os.getenv("SMARTSCM_COMPACT_PROMPT", "0") == "1"
+PROMPT_TOKEN_BUDGET = int(os.getenv("SMARTSCM_PROMPT_TOKEN_BUDGET", 0)) or None
+
+# Compaction levels, each one trims more of the static text:
+# 0 - full prompt
+# 1 - dedented template, first paragraph of each tool description
+# 2 - JSON schemas instead of the verbose format instructions
+# 3 - first sentence of each tool description
+MAX_LEVEL = 3
+
+ORCHESTRATOR_TEMPLATE = """
+                You are an intelligent assistant that can perform two things:
+
+                    1. Help users with **supply chain data analysis**, using the available tools.
+
+                Use the tools when appropriate, and keep conversations natural and helpful.
+
+                ---
+
+                ## Data available :
+                you have access to data from {start_date} to {end_date}.
+
+                ---
+
+                ## 🛠️ Tool Details
+
+                {tools}
+                **DataVisualizationTool** expects input in the following format:  
+                {input_schema}
+
+                ---
+
+                ## 🎯 Task
+
+                **{problem}**
+
+                ---
+
+                ## ✅ Instructions (for data analysis tasks)
+
+                1. **Understand the Problem**  
+                Ask clarifying questions if needed. Identify the key goals, relevant data, and any constraints.
+
+                2. **Validate the Plan**  
+                Summarize the plan for the user to confirm before proceeding.
+
+                3. **Execute the Plan**  
+                Perform the steps using the appropriate tools.  
+                Share progress and results clearly with the user.
+
+                4. **Format the Output**  
+                Make sure your Markdown output is clear, well-organized, and visually appealing. Use headings, lists, tables, and emphasis to improve readability.
+
+                ---
+
+                ## 📤 Output Format
+
+                {output_format}
+
+                ---
+
+                ## Extra Instructions:
+                {prefix_prompt}
+            """
+
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with tiktoken when installed, and estimates ~4 characters per token otherwise."""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _trim_description(description: str, level: int) -> str:
+    if level == 0:
+        return description
+    description = description.strip().split("\n\n")[0]
+    if level >= 3:
+        description = description.split(". ")[0].rstrip(".") + "."
+    return " ".join(description.split())
+
+
+def _compact_schema(model) -> str:
+    return "A JSON object matching this JSON schema: " + json.dumps(
+        model.model_json_schema(), separators=(",", ":")
+    )
+
+
+class OrchestratorPromptBuilder:
+    """
+    Holds the orchestrator prompt templates with every static part (tool descriptions,
+    schemas, output format, data dates) already filled in, one template per compaction
+    level, along with the token count of that static part.
+    """
+
+    def __init__(self, tools, output_model, input_model):
+        self._templates = {}
+        self._static_tokens = {}
+        for level in range(MAX_LEVEL + 1):
+            if level >= 2:
+                output_format = _compact_schema(output_model)
+                input_schema = _compact_schema(input_model)
+            else:
+                output_format = JsonOutputParser(pydantic_object=output_model).get_format_instructions()
+                input_schema = JsonOutputParser(pydantic_object=input_model).get_format_instructions()
+            template = PromptTemplate(
+                input_variables=["problem", "prefix_prompt"],
+                partial_variables={
+                    "output_format": output_format,
+                    "tools": "\n".join(
+                        [f"- {tool.name}: {_trim_description(tool.description, level)}" for tool in tools]
+                    ),
+                    "input_schema": input_schema,
+                    "start_date": DATA_START_DATE,
+                    "end_date": DATA_END_DATE,
+                },
+                template=ORCHESTRATOR_TEMPLATE if level == 0 else textwrap.dedent(ORCHESTRATOR_TEMPLATE),
+            )
+            self._templates[level] = template
+            self._static_tokens[level] = count_tokens(template.format(problem="", prefix_prompt=""))
+
+    def static_tokens(self, level: int = 0) -> int:
+        return self._static_tokens[level]
+
+    def build(self, problem: str, prefix_prompt: str = "", compact: bool = False, token_budget: Optional[int] = None) -> Tuple[str, int, int]:
+        """
+        Formats the prompt at the least compacted level that fits `token_budget`
+        (starting at level 1 in compact mode). When no level fits, the most compact one is used.
+
+        Returns:
+            tuple: (prompt, token count, compaction level)
+        """
+        variable_tokens = count_tokens(problem) + count_tokens(prefix_prompt)
+        level = 1 if compact else 0
+        if token_budget is not None:
+            while level < MAX_LEVEL and self._static_tokens[level] + variable_tokens > token_budget:
+                level += 1
+        prompt = self._templates[level].format(problem=problem, prefix_prompt=prefix_prompt)
+        return prompt, self._static_tokens[level] + variable_tokens, level
+
+
+_builders = {}
+_builders_lock = threading.Lock()
+
+
+def get_prompt_builder(tools, output_model, input_model) -> OrchestratorPromptBuilder:
+    """Returns the process-wide builder for this tool set, compiling its templates on first use."""
+    key = (
+        tuple((type(tool).__name__, tool.name, tool.description) for tool in tools),
+        output_model,
+        input_model,
+    )
+    if key not in _builders:
+        with _builders_lock:
+            if key not in _builders:
+                _builders[key] = OrchestratorPromptBuilder(tools, output_model, input_model)
+    return _builders[key]
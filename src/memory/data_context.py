@@ -0,0 +1,78 @@
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from tools.columnar_store import handoff
+
+
+class DataContext:
+    """
+    The DataFrame loaded for one session.
+
+    The context owns the frame set by the data loader and records where it came from
+    (date range and the fingerprint of the day files), so a follow-up question on the
+    same range can reuse it instead of loading it again. Readers get a `view()`: with
+    Copy-on-Write it shares the loaded columns, and modifying it copies only the
+    touched columns instead of changing the session's frame. Without it, a view is a
+    deep copy.
+    """
+
+    def __init__(self):
+        self._df: Optional[pd.DataFrame] = None
+        self._source: Optional[dict] = None
+        self._memory_bytes: Optional[int] = None
+        self._aggregates: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def set(self, df: Optional[pd.DataFrame], source: Optional[dict] = None, aggregates: Optional[pd.DataFrame] = None):
+        """
+        Replaces the session's frame. `source` describes how it was loaded (see `matches`)
+        and `aggregates` are the daily rollups of the same orders, when available.
+        """
+        with self._lock:
+            self._df = df
+            self._source = source
+            self._aggregates = aggregates
+            self._memory_bytes = None
+            self.version += 1
+
+    def clear(self):
+        self.set(None)
+
+    def view(self) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._df
+        return handoff(df) if df is not None else None
+
+    @property
+    def aggregates(self) -> Optional[pd.DataFrame]:
+        with self._lock:
+            aggregates = self._aggregates
+        return handoff(aggregates) if aggregates is not None else None
+
+    def matches(self, source: dict) -> bool:
+        """Whether the loaded frame was loaded from exactly `source` (same range, same files)."""
+        with self._lock:
+            return self._df is not None and self._source == source
+
+    def holds(self, df: Optional[pd.DataFrame]) -> bool:
+        with self._lock:
+            return self._df is df
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            if self._df is None:
+                return 0
+            if self._memory_bytes is None:
+                self._memory_bytes = int(self._df.memory_usage(deep=True).sum())
+            return self._memory_bytes
+
+    def describe(self) -> str:
+        """One line summary of the loaded frame, e.g. "1,234 rows x 13 columns (0.4 MB)"."""
+        with self._lock:
+            df = self._df
+        if df is None:
+            return "no data loaded"
+        return f"{len(df):,} rows x {df.shape[1]} columns ({self.memory_bytes() / 1024 ** 2:.1f} MB)"
@@ -0,0 +1,111 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from tools.markdown_format import markdown_table
+
+MAX_RESULTS = int(os.getenv("SMARTSCM_MAX_RESULTS", 64))
+MAX_TABLE_ROWS = int(os.getenv("SMARTSCM_MAX_TABLE_ROWS", 50))
+RESULT_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+PLACEHOLDER = re.compile(r"\{\{\s*(table|value)\s*:\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+PUBLISH_DESCRIPTION = (
+    "To share a result table, call `publish(\"name\", result)` in the python REPL with a DataFrame, "
+    "Series or single value instead of printing all of it. In your answer, give the name it was published "
+    "under and its placeholder, `{{table:name}}` (or `{{value:name}}` for a single value): the placeholder "
+    "shows the data in the final answer and the name plots it with data_vizualization (`source`)."
+)
+
+
+class ResultRegistry:
+    """
+    Named results published by the pandas agent for one session.
+
+    Code run in the agent's REPL stores a DataFrame, Series or value with `publish`;
+    the visualization tool reads it back by name and `render` replaces the
+    `{{table:name}}` / `{{value:name}}` placeholders of the final answer with the data,
+    so result tables never have to be copied through model tokens. At most
+    `max_results` results are kept, the least recently published are dropped first.
+    """
+
+    def __init__(self, max_results: int = MAX_RESULTS, max_table_rows: int = MAX_TABLE_ROWS):
+        self.max_results = max_results
+        self.max_table_rows = max_table_rows
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, name: str, result) -> str:
+        """
+        Stores `result` under `name`, replacing any previous result of that name.
+
+        Raises:
+            ValueError: If `name` is not a valid identifier.
+        """
+        if not isinstance(name, str) or not RESULT_NAME.match(name):
+            raise ValueError(f"Invalid result name {name!r}, use letters, digits and underscores.")
+        if isinstance(result, (pd.DataFrame, pd.Series)):
+            # Published results must not change if the REPL keeps modifying its variable
+            result = result.copy()
+        with self._lock:
+            self._results.pop(name, None)
+            self._results[name] = result
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        if isinstance(result, (pd.DataFrame, pd.Series)):
+            return f"Published `{name}` ({type(result).__name__} {result.shape})"
+        return f"Published `{name}`"
+
+    def get(self, name: str):
+        with self._lock:
+            return self._results.get(name)
+
+    def names(self) -> list:
+        with self._lock:
+            return list(self._results)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def _table(self, result) -> str:
+        if isinstance(result, pd.Series):
+            result = result.to_frame()
+        if not isinstance(result, pd.DataFrame):
+            return str(result)
+        index = not isinstance(result.index, pd.RangeIndex)
+        table = markdown_table(result.head(self.max_table_rows), index=index)
+        if len(result) > self.max_table_rows:
+            table += f"\n\n_{self.max_table_rows} of {len(result)} rows shown._"
+        return table
+
+    @staticmethod
+    def _value(result) -> str:
+        if isinstance(result, (pd.DataFrame, pd.Series)) and result.size == 1:
+            result = result.to_numpy().item()
+        if isinstance(result, float):
+            return f"{result:,.2f}"
+        return str(result)
+
+    @staticmethod
+    def _is_table(result) -> bool:
+        return isinstance(result, (pd.DataFrame, pd.Series)) and result.size > 1
+
+    def render(self, markdown: str) -> str:
+        """Replaces the result placeholders of `markdown` with the published data."""
+        if not isinstance(markdown, str) or "{{" not in markdown:
+            return markdown
+
+        def replace(match):
+            kind, name = match.groups()
+            result = self.get(name)
+            if result is None:
+                return f"_(result `{name}` was not published)_"
+            if not self._is_table(result):
+                return self._value(result)
+            # A table is only parsed as one on its own lines, even when the placeholder is mid-sentence
+            return f"\n\n{self._table(result)}\n\n"
+
+        return PLACEHOLDER.sub(replace, markdown)
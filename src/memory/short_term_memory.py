@@ -1,7 +1,83 @@
-from langchain.memory import ConversationBufferWindowMemory
+import os
+import time
+import threading
+from collections import OrderedDict
+from langchain.memory import ConversationBufferWindowMemory, ConversationSummaryBufferMemory
 
-agent_short_term_memory = ConversationBufferWindowMemory(
-    memory_key="chat_history",
-    return_messages=True,
-    k=3, 
-)
+MEMORY_WINDOW = 3
+MEMORY_MODE = os.getenv("SMARTSCM_MEMORY_MODE", "window")  # "window" or "summary"
+MAX_SESSIONS = int(os.getenv("SMARTSCM_MEMORY_MAX_SESSIONS", 256))
+SESSION_TTL = float(os.getenv("SMARTSCM_MEMORY_SESSION_TTL", 3600))
+SUMMARY_MAX_TOKENS = int(os.getenv("SMARTSCM_MEMORY_SUMMARY_MAX_TOKENS", 1000))
+
+
+class SessionMemoryStore:
+    """
+    Conversation memories keyed by session/run id.
+
+    Each session gets its own memory, so concurrent Streamlit users and benchmark
+    threads never read or write each other's turns. Sessions idle for more than `ttl`
+    seconds are dropped, and the least recently used ones are dropped past
+    `max_sessions`. In "summary" mode older turns are compacted by the LLM into a
+    running summary once the history exceeds `summary_max_tokens`.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = MAX_SESSIONS,
+        ttl: float = SESSION_TTL,
+        mode: str = MEMORY_MODE,
+        summary_max_tokens: int = SUMMARY_MAX_TOKENS,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.mode = mode
+        self.summary_max_tokens = summary_max_tokens
+        self._sessions = OrderedDict()  # session_id -> (memory, last_used)
+        self._lock = threading.Lock()
+
+    def _new_memory(self, llm=None):
+        if self.mode == "summary" and llm is not None:
+            return ConversationSummaryBufferMemory(
+                llm=llm,
+                memory_key="chat_history",
+                return_messages=True,
+                max_token_limit=self.summary_max_tokens,
+            )
+        return ConversationBufferWindowMemory(
+            memory_key="chat_history",
+            return_messages=True,
+            k=MEMORY_WINDOW,
+        )
+
+    def _evict(self, now: float):
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_used <= self.ttl:
+                break
+            self._sessions.pop(session_id)
+
+    def get(self, session_id: str, llm=None):
+        """Returns the memory of the session, creating it on first use."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            memory = entry[0] if entry is not None and now - entry[1] <= self.ttl else self._new_memory(llm)
+            self._sessions[session_id] = (memory, now)
+            self._evict(now)
+            return memory
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+session_memory_store = SessionMemoryStore()
+
+
+def get_session_memory(session_id: str, llm=None):
+    return session_memory_store.get(session_id, llm=llm)
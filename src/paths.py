@@ -3,3 +3,6 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(BASE_DIR, "final_data", "data")
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+ORDER_STORE_PATH = os.path.join(CACHE_DIR, "order_store")
+RAG_INDEX_PATH = os.path.join(CACHE_DIR, "rag_index")
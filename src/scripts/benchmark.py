@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import os
 import sys
@@ -15,12 +16,22 @@ import string
 
 load_dotenv()
 
+VARIANT = "default"
+PREFIX_PROMPT = "if you cant answer for any reason please output this 'The system cannot answer this question'"
+
 def invoke(query: str) -> str:
 
     from agents.orchestrator import LLMOrchestrator
 
-    pandas_agent=LLMOrchestrator(disable_callbacks=True,variant="defauly")
-    return pandas_agent.orchestrate(query,prefix_prompt="if you cant answer for any reason please output this 'The system cannot answer this question'")
+    pandas_agent=LLMOrchestrator(disable_callbacks=True,variant=VARIANT)
+    return pandas_agent.orchestrate(query,prefix_prompt=PREFIX_PROMPT)
+
+async def ainvoke(query: str) -> str:
+
+    from agents.orchestrator import LLMOrchestrator
+
+    pandas_agent=LLMOrchestrator(disable_callbacks=True,variant=VARIANT)
+    return await pandas_agent.aorchestrate(query,prefix_prompt=PREFIX_PROMPT)
 
 def generate_agent_answers(invoke_callback: Callable[[str], str], dataset: List[Dict[str, Any]]) -> pd.DataFrame:
     from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -72,6 +83,46 @@ def generate_agent_answers(invoke_callback: Callable[[str], str], dataset: List[
     return pd.DataFrame(results)
 
 
+async def generate_agent_answers_async(ainvoke_callback, dataset: List[Dict[str, Any]], max_concurrency: int = 16) -> pd.DataFrame:
+    total = len(dataset)
+    print(f"🔍 Starting async answer generation on {total} dataset entries...\n")
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def process_entry(entry_idx: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            run_id = str(uuid.uuid4())
+            print(f"➡️  [{entry_idx+1}/{total}] Running entry with name: {run_id}")
+
+            @traceable(name=run_id, project_name="PFE")
+            async def orchestrate(input: str) -> str:
+                return await ainvoke_callback(input)
+
+            input_str = entry["questions"]
+            output = await orchestrate(input=input_str)
+
+            return {
+                "run_id": run_id,
+                "question": input_str,
+                "generated_answer": output["output"],
+                "plan":output["plan"]
+            }
+
+    outputs = await asyncio.gather(
+        *(process_entry(i, entry) for i, entry in enumerate(dataset)), return_exceptions=True
+    )
+    results = [
+        output if not isinstance(output, BaseException) else {
+            "run_id": None,
+            "question": None,
+            "generated_answer": "There was an error",
+            "plan": None,
+        }
+        for output in outputs
+    ]
+    print(f"✅ Finished all entries.")
+    return pd.DataFrame(results)
+
+
 def get_langsmith_data(results: List[Dict[str, Any]]) -> pd.DataFrame:
     run_ids = {r["run_id"] for r in results}  # Use set for faster lookup
     print(f"📡 Fetching LangSmith run data for {len(run_ids)} runs...\n")
@@ -102,11 +153,36 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Read a CSV file and print its columns.")
     parser.add_argument("--original", action="store_true", help="Use reformulated answer if set, otherwise use original answer")
     parser.add_argument("--name", type=str, default=None, help="Optional name for the benchmark run (used as filename)")
+    parser.add_argument("--async_mode", action="store_true", help="Run every entry on one event loop with aorchestrate instead of a thread per entry")
     args = parser.parse_args()    
 
+    from tools.columnar_store import enable_copy_on_write
+
+    # Same pandas setup as the Streamlit app
+    enable_copy_on_write()
+
     dataset = pd.read_csv("dataset.csv")
 
-    answers= generate_agent_answers(dataset=dataset.to_dict(orient="records"), invoke_callback=invoke)
+    if VARIANT == "rag":
+        # Build the shared column index once instead of inside the first 16 workers
+        from tools.rag_tool import warm_up
+        warm_up()
+
+    if args.async_mode:
+        answers = asyncio.run(generate_agent_answers_async(dataset=dataset.to_dict(orient="records"), ainvoke_callback=ainvoke))
+    else:
+        answers= generate_agent_answers(dataset=dataset.to_dict(orient="records"), invoke_callback=invoke)
+
+    from tools.data_cache import data_cache, cube_cache
+    from agents.llm_cache import get_llm_cache
+    print(f"📦 DataFrame cache: {data_cache.stats()}")
+    print(f"🧊 Daily cube cache: {cube_cache.stats()}")
+    if get_llm_cache() is not None:
+        print(f"💾 LLM response cache: {get_llm_cache().stats()}")
+    from agents.plan_rules import validation_stats
+    print(f"🧭 Plan validation: {validation_stats()}")
+    from tools.data_vizualization_tool import chart_cache_stats
+    print(f"🖼️ Chart cache: {chart_cache_stats()}")
     file_name = ''.join(random.choices(string.ascii_letters + string.digits, k=8)) + ".csv" if args.name is None else args.name + ".csv"
     try:
         final_df = get_langsmith_data(results=answers.to_dict(orient="records"))
@@ -0,0 +1,58 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from tools.data_vizualization_tool import render_chart
+
+
+def chart_inputs(count: int, points: int, seed: int = 0) -> list:
+    """Distinct line charts, so no request is a cache hit."""
+    rng = np.random.default_rng(seed)
+    x_data = [f"2025-01-{day % 28 + 1:02d}" for day in range(points)]
+    return [
+        ("line", "OrderDate", "TotalAmount", x_data, rng.integers(100, 10000, points).tolist())
+        for _ in range(count)
+    ]
+
+
+def time_renders(inputs: list, output_dir: str, executor) -> float:
+    start = time.perf_counter()
+    futures = [
+        executor.submit(render_chart, *chart, os.path.join(output_dir, f"{i}.png"))
+        for i, chart in enumerate(inputs)
+    ]
+    errors = [future.result() for future in futures]
+    assert not any(errors), errors
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time parallel chart rendering with threads and processes.")
+    parser.add_argument("--charts", type=int, default=32, help="Charts rendered per measurement")
+    parser.add_argument("--points", type=int, default=60, help="Points per chart")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Threads/processes used")
+    args = parser.parse_args()
+
+    inputs = chart_inputs(args.charts, args.points)
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            results.append({"mode": "serial", "seconds": time_renders(inputs, output_dir, executor)})
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            results.append({"mode": f"threads x{args.workers}", "seconds": time_renders(inputs, output_dir, executor)})
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            # First batch only starts the workers and imports matplotlib
+            time_renders(inputs[: args.workers], output_dir, executor)
+            results.append({"mode": f"processes x{args.workers}", "seconds": time_renders(inputs, output_dir, executor)})
+        df = pd.DataFrame(results)
+        df["charts/sec"] = (args.charts / df["seconds"]).round(1)
+        df["seconds"] = df["seconds"].round(3)
+        print(df.to_string(index=False))
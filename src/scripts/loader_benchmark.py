@@ -0,0 +1,81 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from tools.columnar_store import LOAD_WORKERS, list_day_files, read_days, apply_order_dtypes
+
+RANGES = [1, 30, 180, 365]
+FIRST_DAY = pd.Timestamp("2024-01-01")
+
+
+def generate_synthetic_days(data_path: str, days: int, rows_per_day: int, seed: int = 0):
+    """Writes `days` daily CSV files shaped like final_data/data into `data_path`."""
+    rng = np.random.default_rng(seed)
+    order_id = 1000
+    for i in range(days):
+        day = FIRST_DAY + pd.Timedelta(days=i)
+        quantity = rng.integers(1, 500, rows_per_day)
+        unit_price = rng.choice([12.0, 35.0, 65.0, 150.0, 1200.0], rows_per_day)
+        df = pd.DataFrame({
+            "OrderID": np.arange(order_id, order_id + rows_per_day),
+            "OrderDate": day.strftime("%Y-%m-%d"),
+            "DeliveryDate": (day + pd.Timedelta(days=3)).strftime("%Y-%m-%d"),
+            "OrderType": rng.choice(["Standard", "Express"], rows_per_day),
+            "Status": rng.choice(["Pending", "In Transit", "Completed"], rows_per_day),
+            "CustomerName": rng.choice([f"Customer {c}" for c in range(200)], rows_per_day),
+            "ProductName": rng.choice([f"Product {p}" for p in range(50)], rows_per_day),
+            "Quantity": quantity,
+            "UnitPrice": unit_price,
+            "TotalAmount": quantity * unit_price,
+            "ShippingAddress": rng.choice([f"{n} Main St" for n in range(500)], rows_per_day),
+            "City": rng.choice(["New York", "Los Angeles", "Chicago", "Houston", "Phoenix"], rows_per_day),
+            "Region": rng.choice(["Northeast", "West", "Midwest", "South"], rows_per_day),
+        })
+        df.to_csv(os.path.join(data_path, f"{day.strftime('%Y-%m-%d')}.csv"), index=False)
+        order_id += rows_per_day
+
+
+def time_load(data_path: str, days: int, max_workers: int, repeat: int) -> float:
+    start_date = FIRST_DAY.strftime("%Y-%m-%d")
+    end_date = (FIRST_DAY + pd.Timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    # The store path does not exist, so both readers parse the CSV files
+    store_path = os.path.join(data_path, "no_store")
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        day_files = list_day_files(start_date, end_date, data_path=data_path)
+        df = apply_order_dtypes(pd.concat(read_days(day_files, store_path=store_path, max_workers=max_workers), ignore_index=True))
+        timings.append(time.perf_counter() - start)
+    assert len(df) > 0
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time serial vs parallel loading of daily order files.")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows per synthetic day file")
+    parser.add_argument("--workers", type=int, default=LOAD_WORKERS, help="Threads used by the parallel reader")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the best one is kept)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_path:
+        print(f"🧪 Generating {max(RANGES)} synthetic day files with {args.rows} rows each...\n")
+        generate_synthetic_days(data_path, max(RANGES), args.rows)
+        results = []
+        for days in RANGES:
+            serial = time_load(data_path, days, 1, args.repeat)
+            parallel = time_load(data_path, days, args.workers, args.repeat)
+            results.append({
+                "days": days,
+                "rows": days * args.rows,
+                "serial (sec)": round(serial, 4),
+                f"parallel x{args.workers} (sec)": round(parallel, 4),
+                "speedup": round(serial / parallel, 2),
+            })
+        print(pd.DataFrame(results).to_string(index=False))
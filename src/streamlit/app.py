@@ -1,5 +1,16 @@
 from agents.orchestrator import LLMOrchestrator
+from agents.llm_factory import get_llm
+from memory.short_term_memory import session_memory_store
+from tools.order_store import get_order_store
+from tools.report_engine import get_report_engine
+from tools.data_loader_tool import USE_ORDER_STORE
+from tools.columnar_store import enable_copy_on_write
 import streamlit as st
+import uuid
+import os
+
+# Predefined reports are computed by the report engine instead of the agents
+NATIVE_REPORTS = os.getenv("SMARTSCM_NATIVE_REPORTS", "1") != "0"
 
 # ---- Page Config ----
 st.set_page_config(page_title="SmartSCM Assistant", layout="centered")
@@ -39,6 +50,20 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# ---- Process-wide Resources ----
+@st.cache_resource
+def warm_up():
+    # Views of the session frames share the loaded columns until one of them is written to
+    enable_copy_on_write()
+    # Shared by every session: the order data and the pooled LLM clients
+    if USE_ORDER_STORE:
+        get_order_store()
+    get_llm(max_tokens=2048)
+    get_llm(max_tokens=8192)
+    return True
+
+warm_up()
+
 # ---- Session State Init ----
 if "history" not in st.session_state:
     st.session_state.history = []
@@ -46,11 +71,21 @@ if "is_generating" not in st.session_state:
     st.session_state.is_generating = False
 if "queued_prompt" not in st.session_state:
     st.session_state.queued_prompt = None
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
+if "orchestrator" not in st.session_state:
+    st.session_state.orchestrator = None
+if "queued_report" not in st.session_state:
+    st.session_state.queued_report = None
 
 # ---- New Chat Button ----
 if st.button("🔄 Start New Chat", disabled=st.session_state.is_generating):
     st.session_state.history = []
     st.session_state.queued_prompt = None
+    st.session_state.queued_report = None
+    session_memory_store.drop(st.session_state.session_id)
+    st.session_state.session_id = str(uuid.uuid4())
+    st.session_state.orchestrator = None
     st.rerun()
 
 st.markdown(
@@ -90,6 +125,7 @@ st.markdown(
 predefined_prompts = [
     {
         "label": "📅 Daily orders report",
+        "report": "daily_orders",
         "prompt": (
             "Generate a daily orders report for today. Include:\n"
             "- Number of orders with OrderDate = today\n"
@@ -104,6 +140,7 @@ predefined_prompts = [
     },
     {
         "label": "📦 Customer analysis",
+        "report": "customer_analysis",
         "prompt": (
             "Generate a customer-wise summary for the last 30 days. For each customer, include:\n"
             "- Total number of orders\n"
@@ -118,6 +155,7 @@ predefined_prompts = [
     },
     {
         "label": "🌍 Regional overview",
+        "report": "regional_overview",
         "prompt": (
             "Group order data by Region and City. For each region, include:\n"
             "- Total number of orders\n"
@@ -137,12 +175,16 @@ with st.expander("💡 Try a predefined report", expanded=True):
     cols = st.columns(len(predefined_prompts))
     for i, item in enumerate(predefined_prompts):
         with cols[i]:
-            if st.button(item["label"], disabled=st.session_state.queued_prompt is not None, help=item["detail"]):
-                st.session_state.queued_prompt = item["prompt"]
+            queued = st.session_state.queued_prompt is not None or st.session_state.queued_report is not None
+            if st.button(item["label"], disabled=queued, help=item["detail"]):
+                if NATIVE_REPORTS:
+                    st.session_state.queued_report = item
+                else:
+                    st.session_state.queued_prompt = item["prompt"]
                 st.rerun()
 
 # ---- Welcome Info Box ----
-if not st.session_state.history and not st.session_state.queued_prompt:
+if not st.session_state.history and not st.session_state.queued_prompt and not st.session_state.queued_report:
     st.info("""
         👋 **Welcome to the SmartSCM Assistant!**
 
@@ -168,6 +210,16 @@ if not st.session_state.history and not st.session_state.queued_prompt:
     """)
 
 # ---- Utils ----
+def get_orchestrator(step_callback):
+    """Returns the session's orchestrator, built on the first prompt and kept warm between turns."""
+    if st.session_state.orchestrator is None:
+        st.session_state.orchestrator = LLMOrchestrator(
+            step_callback=step_callback, verbose=True, session_id=st.session_state.session_id
+        )
+    else:
+        st.session_state.orchestrator.set_step_callback(step_callback)
+    return st.session_state.orchestrator
+
 def remove_consecutive_duplicates(steps):
     if not steps:
         return []
@@ -191,6 +243,26 @@ for entry in st.session_state.history:
         with st.chat_message("assistant"):
             st.markdown(f'<div class="chat-box ai-msg">{entry["response"]}</div>', unsafe_allow_html=True)
 
+# ---- Predefined Report Handling ----
+if not st.session_state.is_generating and st.session_state.queued_report:
+    item = st.session_state.queued_report
+    st.session_state.queued_report = None
+    try:
+        with st.spinner("Computing the report..."):
+            report = get_report_engine().run(item["report"])
+        response = report["markdown"]
+        if report["narration"]:
+            response = f"{report['narration']}\n\n{response}"
+    except Exception as e:
+        response = f"⚠️ Oops! An error occurred: {e}"
+    st.session_state.history.append({
+        "role": "user",
+        "message": item["label"],
+        "steps": [],
+        "response": response,
+    })
+    st.rerun()
+
 # ---- Input Handling ----
 if not st.session_state.is_generating:
     user_prompt = st.chat_input("Type your message...") or st.session_state.queued_prompt
@@ -229,7 +301,7 @@ if not st.session_state.is_generating:
         with step_placeholder.container():
             st.markdown(f'<div class="thinking">Thinking... 🤖</div>', unsafe_allow_html=True)
 
-        agent = LLMOrchestrator(step_callback=step_collector,verbose=True)
+        agent = get_orchestrator(step_collector)
 
         try:
             with st.spinner("SmartSCM is working on your request..."):
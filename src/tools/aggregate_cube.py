@@ -0,0 +1,78 @@
+import pandas as pd
+
+CUBE_DIMENSIONS = ["OrderDate", "Status", "OrderType", "CustomerName", "ProductName", "Region", "City"]
+# Dimensions rolled up together (besides OrderDate), one set per kind of report
+GROUPING_SETS = {
+    "date": [],
+    "status": ["Status", "OrderType"],
+    "customer": ["CustomerName"],
+    "product": ["ProductName"],
+    "customer_product": ["CustomerName", "ProductName"],
+    "region": ["Region", "City"],
+    "region_status": ["Region", "Status", "OrderType"],
+    "region_customer": ["Region", "CustomerName"],
+    "region_product": ["Region", "ProductName"],
+}
+MEASURES = ["OrderCount", "TotalAmount", "Quantity"]
+CUBE_COLUMNS = ["Grouping"] + CUBE_DIMENSIONS + MEASURES
+REQUIRED_COLUMNS = {"OrderID", "OrderDate", "TotalAmount", "Quantity"}
+
+CUBE_DESCRIPTION = (
+    "`df_daily_agg` is preloaded with daily rollups of the same orders as `df`: one row per "
+    "OrderDate and dimension combination, with the measures OrderCount, TotalAmount and Quantity. "
+    "The `Grouping` column tells which dimensions a row is grouped by (the others are NaN): "
+    + "; ".join(
+        f"'{name}' = OrderDate" + "".join(f", {d}" for d in dimensions)
+        for name, dimensions in GROUPING_SETS.items()
+    )
+    + ". Always filter on one `Grouping` before summing. Prefer it over `df` for counts, revenue "
+    "and quantities by date, status, order type, customer, product, region or city."
+)
+
+
+def empty_cube() -> pd.DataFrame:
+    return pd.DataFrame(columns=CUBE_COLUMNS)
+
+
+def rollup(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Builds the daily rollups of a frame of orders: for each grouping set, the number of
+    orders and the summed TotalAmount and Quantity per OrderDate and dimension values.
+    Grouping sets whose columns are missing from `df` are skipped.
+    """
+    if df is None or df.empty or not REQUIRED_COLUMNS.issubset(df.columns):
+        return empty_cube()
+    df = df.assign(OrderDate=pd.to_datetime(df["OrderDate"]).astype("datetime64[ns]"))
+    parts = []
+    for name, dimensions in GROUPING_SETS.items():
+        if not set(dimensions).issubset(df.columns):
+            continue
+        part = df.groupby(["OrderDate"] + dimensions, observed=True, as_index=False).agg(
+            OrderCount=("OrderID", "size"),
+            TotalAmount=("TotalAmount", "sum"),
+            Quantity=("Quantity", "sum"),
+        )
+        part["Grouping"] = name
+        parts.append(part)
+    return _finish(parts)
+
+
+def combine(cubes) -> pd.DataFrame:
+    """Merges rollups of disjoint sets of orders (e.g. one per day file) by summing their measures."""
+    cubes = [cube for cube in cubes if not cube.empty]
+    if not cubes:
+        return empty_cube()
+    if len(cubes) == 1:
+        return cubes[0]
+    df = pd.concat(cubes, ignore_index=True)
+    keys = ["Grouping"] + CUBE_DIMENSIONS
+    # Dimensions that are not part of a row's grouping set are NaN and must stay in the keys
+    df = df.groupby(keys, dropna=False, observed=True, as_index=False, sort=False)[MEASURES].sum()
+    return _finish([df])
+
+
+def _finish(parts) -> pd.DataFrame:
+    df = pd.concat(parts, ignore_index=True).reindex(columns=CUBE_COLUMNS)
+    for column in ["Grouping"] + CUBE_DIMENSIONS[1:]:
+        df[column] = df[column].astype("category")
+    return df.sort_values(["Grouping", "OrderDate"], kind="stable", ignore_index=True)
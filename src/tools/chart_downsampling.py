@@ -0,0 +1,139 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+
+MAX_CHART_POINTS = int(os.getenv("SMARTSCM_CHART_MAX_POINTS", 1000))
+DOWNSAMPLE_METHOD = os.getenv("SMARTSCM_CHART_DOWNSAMPLE", "lttb")  # "lttb" or "minmax"
+BAR_TOP_N = int(os.getenv("SMARTSCM_CHART_BAR_TOP_N", 20))
+# The pie palette of the visualization tool has 6 colors
+PIE_TOP_N = int(os.getenv("SMARTSCM_CHART_PIE_TOP_N", 6))
+OTHER_LABEL = "Other"
+
+
+def _x_positions(values) -> np.ndarray:
+    """Numeric x values, or the positions of the points when x holds dates or labels."""
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return np.arange(len(values), dtype=float)
+
+
+def _y_values(values) -> np.ndarray:
+    """
+    The y values as floats, missing values as NaN.
+
+    Raises:
+        ValueError: If a value is not a number (e.g. "12,000").
+    """
+    series = pd.Series(list(values), dtype=object)
+    numbers = pd.to_numeric(series, errors="coerce")
+    invalid = numbers.isna() & series.notna()
+    if invalid.any():
+        raise ValueError(f"y_data must contain numbers, got {series[invalid].iloc[0]!r}")
+    return numbers.to_numpy(dtype=float)
+
+
+def is_ordered_axis(x_data) -> bool:
+    """Whether the x values are numbers or dates, whose order carries meaning."""
+    series = pd.Series(list(x_data), dtype=object)
+    if pd.to_numeric(series, errors="coerce").notna().all():
+        return True
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        dates = pd.to_datetime(series.astype(str), errors="coerce", format="mixed")
+    return bool(dates.notna().all())
+
+
+def lttb_indices(y, threshold: int, x=None) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: picks `threshold` points that keep the visual shape of
+    the series. Non-numeric x values (dates, labels) are replaced by their positions.
+
+    Returns:
+        np.ndarray: The sorted indices of the kept points.
+    """
+    y = _y_values(y)
+    length = len(y)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+    x = np.arange(length, dtype=float) if x is None else _x_positions(x)
+    bucket = (length - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, length)
+        avg_x = x[end:next_end].mean()
+        avg_y = np.nanmean(y[end:next_end]) if not np.isnan(y[end:next_end]).all() else y[a]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = a
+    selected[-1] = length - 1
+    return selected
+
+
+def min_max_indices(y, threshold: int) -> np.ndarray:
+    """Keeps the minimum and maximum of `threshold // 2` equal buckets, plus both ends."""
+    y = _y_values(y)
+    length = len(y)
+    if threshold >= length or threshold < 4:
+        return np.arange(length)
+    edges = np.linspace(0, length, threshold // 2 + 1).astype(int)
+    filled = np.where(np.isnan(y), np.nanmean(y) if not np.isnan(y).all() else 0.0, y)
+    selected = {0, length - 1}
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            selected.add(start + int(np.argmin(filled[start:end])))
+            selected.add(start + int(np.argmax(filled[start:end])))
+    return np.array(sorted(selected))
+
+
+def downsample(x_data: list, y_data: list, max_points: int = MAX_CHART_POINTS, method: str = DOWNSAMPLE_METHOD):
+    """
+    Reduces line/scatter data to about `max_points` points. With several series, each one
+    gets an equal share of the budget and the union of their points is kept.
+
+    Returns:
+        tuple: (x_data, y_data) with the same layout as the input.
+
+    Raises:
+        ValueError: If a y value is not a number.
+    """
+    is_multi = bool(y_data) and isinstance(y_data[0], (list, tuple))
+    series = y_data if is_multi else [y_data]
+    if not max_points or len(x_data) <= max_points:
+        return x_data, y_data
+    budget = max(max_points // len(series), 4)
+    if method == "minmax":
+        picked = [min_max_indices(values, budget) for values in series]
+    else:
+        picked = [lttb_indices(values, budget, x=x_data) for values in series]
+    indices = np.unique(np.concatenate(picked))
+    x_data = [x_data[i] for i in indices]
+    series = [[values[i] for i in indices] for values in series]
+    return x_data, series if is_multi else series[0]
+
+
+def fold_top_n(x_data: list, y_data: list, top_n: int, other_label: str = OTHER_LABEL):
+    """
+    Keeps the `top_n - 1` largest categories (by total over all series), in their input
+    order, and sums the rest into one "Other" category, so bars and pie slices stay readable.
+
+    Returns:
+        tuple: (x_data, y_data) with the same layout as the input.
+
+    Raises:
+        ValueError: If a y value is not a number.
+    """
+    if not top_n or len(x_data) <= top_n:
+        return x_data, y_data
+    is_multi = bool(y_data) and isinstance(y_data[0], (list, tuple))
+    values = np.nan_to_num(np.array([_y_values(s) for s in y_data] if is_multi else [_y_values(y_data)]))
+    order = np.argsort(-values.sum(axis=0), kind="stable")
+    kept, folded = np.sort(order[: top_n - 1]), order[top_n - 1:]
+    x_data = [x_data[i] for i in kept] + [other_label]
+    series = [row[kept].tolist() + [float(row[folded].sum())] for row in values]
+    return x_data, series if is_multi else series[0]
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+from paths import DATA_PATH, ORDER_STORE_PATH
+from tools.columnar_store import list_day_files, load_manifest, read_day, apply_order_dtypes
+
+AGGREGATE_DIMENSIONS = ["OrderDate", "Status", "OrderType", "Region", "City"]
+OVER_BUDGET_MODES = ("sample", "aggregate")
+
+
+def downcast_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Stores integer columns in the smallest integer dtype that holds their values."""
+    for column in df.select_dtypes(include="integer").columns:
+        df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def iter_day_frames(start_date, end_date, columns=None, downcast=True, data_path=DATA_PATH, store_path=ORDER_STORE_PATH):
+    """Yields the orders of each day file in the range, in date order, one frame at a time."""
+    manifest = load_manifest(store_path)
+    for day, path in list_day_files(start_date, end_date, data_path=data_path):
+        df = read_day(day, path, store_path=store_path, manifest=manifest, columns=columns)
+        yield downcast_frame(df) if downcast else df
+
+
+def _aggregate(df: pd.DataFrame) -> pd.DataFrame:
+    # load_within_budget always reads OrderDate in this mode, so there is at least one dimension
+    dimensions = [d for d in AGGREGATE_DIMENSIONS if d in df.columns]
+    grouped = df.groupby(dimensions, observed=True)
+    result = grouped.size().rename("OrderCount").to_frame()
+    for column in ("TotalAmount", "Quantity"):
+        if column in df.columns:
+            result[column] = grouped[column].sum()
+    return result.reset_index()
+
+
+def _combine_aggregates(partials) -> pd.DataFrame:
+    df = pd.concat(partials, ignore_index=True)
+    dimensions = [d for d in AGGREGATE_DIMENSIONS if d in df.columns]
+    return df.groupby(dimensions, observed=True, as_index=False).sum()
+
+
+def load_within_budget(
+    start_date,
+    end_date,
+    max_rows=None,
+    max_bytes=None,
+    mode="sample",
+    columns=None,
+    seed=0,
+    data_path=DATA_PATH,
+    store_path=ORDER_STORE_PATH,
+):
+    """
+    Streams the day files of the range and materializes them only while they fit in
+    the row/byte budget. Past the budget the result is either a uniform random sample
+    of the rows (mode="sample", kept with bottom-k sampling so memory stays bounded) or
+    daily rollups over `AGGREGATE_DIMENSIONS` (mode="aggregate").
+
+    Returns:
+        tuple: (DataFrame, message) where message explains what was returned instead of
+        the full range, or is None when the whole range fit in the budget.
+    """
+    if mode not in OVER_BUDGET_MODES:
+        raise ValueError(f"Unknown over-budget mode {mode!r}, expected one of {OVER_BUDGET_MODES}")
+    if mode == "aggregate" and columns is not None and "OrderDate" not in columns:
+        # The rollups need at least one dimension to group by
+        columns = ["OrderDate"] + list(columns)
+
+    rng = np.random.default_rng(seed)
+    limit = max_rows
+    total_rows = 0
+    frames = []
+    reservoir = None
+    partials = []
+
+    for df in iter_day_frames(start_date, end_date, columns=columns, data_path=data_path, store_path=store_path):
+        if df.empty:
+            continue
+        if max_bytes is not None:
+            row_bytes = max(1, int(df.memory_usage(deep=True).sum() / len(df)))
+            byte_limit = max(1, max_bytes // row_bytes)
+            limit = byte_limit if limit is None else min(limit, byte_limit)
+        start_row = total_rows
+        total_rows += len(df)
+
+        if limit is None or (reservoir is None and not partials and total_rows <= limit):
+            frames.append(df)
+            continue
+
+        if mode == "aggregate":
+            partials.extend(_aggregate(frame) for frame in frames)
+            partials.append(_aggregate(df))
+            frames = []
+            # Keep the partial rollups bounded as well
+            if len(partials) > 32:
+                partials = [_combine_aggregates(partials)]
+            continue
+
+        df = df.assign(_row=np.arange(start_row, total_rows), _key=rng.random(len(df)))
+        if reservoir is None:
+            previous = pd.concat(frames, ignore_index=True) if frames else df.iloc[:0]
+            previous = previous.assign(_row=np.arange(len(previous)), _key=rng.random(len(previous)))
+            frames = []
+            reservoir = pd.concat([previous, df], ignore_index=True).nsmallest(limit, "_key")
+        else:
+            reservoir = pd.concat([reservoir, df], ignore_index=True).nsmallest(limit, "_key")
+
+    range_label = f"{start_date} to {end_date}"
+    if partials:
+        result = _combine_aggregates(partials)
+        message = (
+            f"⚠️ The range {range_label} holds {total_rows:,} orders, which is over the loading budget. "
+            f"The data was pre-aggregated into {len(result):,} daily rows grouped by "
+            f"{', '.join(c for c in AGGREGATE_DIMENSIONS if c in result.columns)} with the columns "
+            f"{', '.join(c for c in ('OrderCount', 'TotalAmount', 'Quantity') if c in result.columns)}. "
+            "Individual orders are not available; answer from these totals or ask for a shorter range."
+        )
+        return apply_order_dtypes(result), message
+
+    if reservoir is not None:
+        result = reservoir.sort_values("_row").drop(columns=["_row", "_key"]).reset_index(drop=True)
+        message = (
+            f"⚠️ The range {range_label} holds {total_rows:,} orders, which is over the loading budget. "
+            f"A uniform random sample of {len(result):,} orders ({len(result) / total_rows:.1%}) was loaded instead. "
+            f"Counts and sums computed on it must be multiplied by {total_rows / len(result):.2f} "
+            "and every result is an approximation; say so in the answer or ask for a shorter range."
+        )
+        return apply_order_dtypes(result), message
+
+    if not frames:
+        return pd.DataFrame(), None
+    return apply_order_dtypes(pd.concat(frames, ignore_index=True)), None
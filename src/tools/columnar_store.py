@@ -0,0 +1,194 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from paths import DATA_PATH, ORDER_STORE_PATH
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+DATE_FORMAT = "%Y-%m-%d"
+MANIFEST_NAME = "manifest.json"
+CATEGORICAL_COLUMNS = ["Status", "OrderType", "Region", "City"]
+DATE_COLUMNS = ["OrderDate", "DeliveryDate"]
+PANDAS_MAJOR = int(pd.__version__.split(".")[0])
+LOAD_WORKERS = int(os.getenv("SMARTSCM_LOAD_WORKERS", min(8, os.cpu_count() or 1)))
+
+
+def enable_copy_on_write():
+    """Turns on pandas Copy-on-Write, which is always on from pandas 3."""
+    if PANDAS_MAJOR < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def copy_on_write_enabled() -> bool:
+    return PANDAS_MAJOR >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
+def handoff(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns a frame the caller may modify without touching `df`: a shallow copy under
+    Copy-on-Write, where the first write copies the touched columns, and a deep copy otherwise.
+    """
+    return df.copy(deep=not copy_on_write_enabled())
+
+
+def drop_unused_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Removes the categories a slice no longer uses, so `value_counts` and groupby only
+    report values present in the slice, as for a frame loaded from its own day files.
+    """
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+
+def normalize_date(date: str) -> str:
+    return datetime.strptime(date.strip(), DATE_FORMAT).strftime(DATE_FORMAT)
+
+
+def list_day_files(start_date=None, end_date=None, data_path=DATA_PATH):
+    """
+    Returns the daily CSV files of `data_path` as (day, path) tuples sorted by day.
+    Files whose name is not a YYYY-MM-DD date are ignored. `start_date` and
+    `end_date` are optional inclusive bounds given as YYYY-MM-DD strings.
+    """
+    start = datetime.strptime(start_date, DATE_FORMAT) if start_date else None
+    end = datetime.strptime(end_date, DATE_FORMAT) if end_date else None
+    day_files = []
+    for f in os.listdir(data_path):
+        name, ext = os.path.splitext(f)
+        if ext != ".csv":
+            continue
+        try:
+            day = datetime.strptime(name, DATE_FORMAT)
+        except ValueError:
+            continue
+        if (start is None or start <= day) and (end is None or day <= end):
+            day_files.append((day, os.path.join(data_path, f)))
+    day_files.sort()
+    return day_files
+
+
+def apply_order_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Casts the order columns to the dtypes used by both the CSV and the columnar path."""
+    for column in DATE_COLUMNS:
+        if column in df.columns and df[column].dtype != "datetime64[ns]":
+            # Engines disagree on the resolution, so every path ends up in nanoseconds
+            df[column] = pd.to_datetime(df[column], format=DATE_FORMAT, errors="coerce").astype("datetime64[ns]")
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    return df
+
+
+def read_csv_day(path: str, columns=None) -> pd.DataFrame:
+    engine = "pyarrow" if HAS_PYARROW else "c"
+    return apply_order_dtypes(pd.read_csv(path, usecols=columns, engine=engine))
+
+
+def _source_signature(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _partition_path(day: datetime, store_path: str) -> str:
+    return os.path.join(store_path, f"{day.strftime(DATE_FORMAT)}.parquet")
+
+
+def load_manifest(store_path: str = ORDER_STORE_PATH) -> dict:
+    """Returns the {day: source signature} manifest of the store, or {} if there is no store."""
+    try:
+        with open(os.path.join(store_path, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_day(day: datetime, csv_path: str, store_path: str = ORDER_STORE_PATH, manifest=None, columns=None) -> pd.DataFrame:
+    """
+    Reads one day of orders from the columnar store when its partition is up to date
+    with the source CSV, and from the CSV otherwise. `columns` optionally restricts
+    the columns that are read.
+    """
+    if HAS_PYARROW:
+        manifest = load_manifest(store_path) if manifest is None else manifest
+        if manifest.get(day.strftime(DATE_FORMAT)) == _source_signature(csv_path):
+            try:
+                return pd.read_parquet(_partition_path(day, store_path), columns=columns)
+            except OSError:
+                pass
+    return read_csv_day(csv_path, columns=columns)
+
+
+def read_days(day_files, store_path: str = ORDER_STORE_PATH, max_workers: int = LOAD_WORKERS, columns=None) -> list:
+    """
+    Reads the given (day, path) files through a bounded thread pool.
+    The frames are returned in the order of `day_files`.
+    """
+    manifest = load_manifest(store_path)
+
+    def read(day_file):
+        day, path = day_file
+        return read_day(day, path, store_path=store_path, manifest=manifest, columns=columns)
+
+    if max_workers <= 1 or len(day_files) <= 1:
+        return [read(day_file) for day_file in day_files]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(day_files))) as executor:
+        return list(executor.map(read, day_files))
+
+
+def build_store(data_path: str = DATA_PATH, store_path: str = ORDER_STORE_PATH, force: bool = False) -> int:
+    """
+    Converts the daily CSV files into one typed Parquet partition per day.
+    Only missing or stale partitions are rewritten unless `force` is set.
+
+    Returns:
+        int: The number of partitions written.
+    """
+    if not HAS_PYARROW:
+        raise ImportError("pyarrow is required to build the columnar order store.")
+    os.makedirs(store_path, exist_ok=True)
+    manifest = {} if force else load_manifest(store_path)
+    written = 0
+    day_files = list_day_files(data_path=data_path)
+    for day, csv_path in day_files:
+        key = day.strftime(DATE_FORMAT)
+        signature = _source_signature(csv_path)
+        if manifest.get(key) == signature and os.path.exists(_partition_path(day, store_path)):
+            continue
+        read_csv_day(csv_path).to_parquet(_partition_path(day, store_path), index=False)
+        manifest[key] = signature
+        written += 1
+
+    # Drop partitions whose source file has been removed
+    known_days = {day.strftime(DATE_FORMAT) for day, _ in day_files}
+    for key in list(manifest):
+        if key not in known_days:
+            manifest.pop(key)
+            partition = os.path.join(store_path, f"{key}.parquet")
+            if os.path.exists(partition):
+                os.remove(partition)
+
+    tmp_manifest = os.path.join(store_path, MANIFEST_NAME + ".tmp")
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest, os.path.join(store_path, MANIFEST_NAME))
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the daily order CSV files into a columnar Parquet store.")
+    parser.add_argument("--force", action="store_true", help="Rewrite every partition, even up-to-date ones")
+    args = parser.parse_args()
+    count = build_store(force=args.force)
+    print(f"✅ {count} partition(s) written to {ORDER_STORE_PATH}")
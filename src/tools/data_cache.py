@@ -0,0 +1,180 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+from tools.columnar_store import DATE_FORMAT, normalize_date, handoff, drop_unused_categories
+
+DF_CACHE_MAX_BYTES = int(os.getenv("SMARTSCM_DF_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+CUBE_CACHE_MAX_DAYS = int(os.getenv("SMARTSCM_CUBE_CACHE_MAX_DAYS", 3650))
+
+
+def fingerprint(day_files) -> dict:
+    """Returns {day: (mtime_ns, size)} for the given (day, path) tuples."""
+    result = {}
+    for day, path in day_files:
+        stat = os.stat(path)
+        result[day.strftime(DATE_FORMAT)] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+class _Entry:
+    def __init__(self, df: pd.DataFrame, files: dict, offsets: dict):
+        self.df = df
+        self.files = files
+        # {day: (first_row, stop_row)}; days are concatenated in date order
+        self.offsets = offsets
+        self.nbytes = int(df.memory_usage(deep=True).sum())
+
+
+class DataFrameCache:
+    """
+    Thread-safe, memory-bounded LRU cache of date-range loads.
+
+    Entries are keyed by (data_path, start_date, end_date) and are only served while
+    the mtime/size fingerprint of the underlying daily files is unchanged. A request
+    whose range is contained in a cached range is answered by slicing the cached frame.
+    """
+
+    def __init__(self, max_bytes: int = DF_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._nbytes = 0
+        self.hits = 0
+        self.range_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, data_path: str, start: str, end: str, files: dict):
+        with self._lock:
+            entry = self._entries.get((data_path, start, end))
+            if entry is not None and entry.files == files:
+                self._entries.move_to_end((data_path, start, end))
+                self.hits += 1
+                return handoff(entry.df)
+
+            for key, entry in reversed(self._entries.items()):
+                path, entry_start, entry_end = key
+                if path != data_path or not (entry_start <= start and end <= entry_end):
+                    continue
+                # The cached range must hold exactly the same files for the requested days
+                covered = {day: sig for day, sig in entry.files.items() if start <= day <= end}
+                if covered != files:
+                    continue
+                self._entries.move_to_end(key)
+                self.range_hits += 1
+                if not files:
+                    return pd.DataFrame()
+                first = entry.offsets[min(files)][0]
+                stop = entry.offsets[max(files)][1]
+                return drop_unused_categories(handoff(entry.df.iloc[first:stop].reset_index(drop=True)))
+        return None
+
+    def _store(self, data_path: str, start: str, end: str, entry: _Entry):
+        if entry.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            key = (data_path, start, end)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous.nbytes
+            self._entries[key] = entry
+            self._nbytes += entry.nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self.evictions += 1
+
+    def get_or_load(self, data_path: str, start_date: str, end_date: str, day_files, loader) -> pd.DataFrame:
+        """
+        Returns a copy (see `handoff`) of the cached frame for the range, or calls `loader()` on a miss.
+        `loader` must return a (DataFrame, offsets) tuple. Concurrent misses on the same
+        range wait for a single load instead of reading the same files in parallel.
+        """
+        start, end = normalize_date(start_date), normalize_date(end_date)
+        files = fingerprint(day_files)
+        df = self._lookup(data_path, start, end, files)
+        if df is not None:
+            return df
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault((data_path, start, end), threading.Lock())
+        with key_lock:
+            try:
+                df = self._lookup(data_path, start, end, files)
+                if df is not None:
+                    return df
+                with self._lock:
+                    self.misses += 1
+                df, offsets = loader()
+                if not df.empty:
+                    self._store(data_path, start, end, _Entry(df, files, offsets))
+                return handoff(df)
+            finally:
+                with self._lock:
+                    self._key_locks.pop((data_path, start, end), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "range_hits": self.range_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class DayCubeCache:
+    """
+    Thread-safe LRU of the daily rollups (see `aggregate_cube`) of each day file.
+
+    Entries are keyed by the path of the file and its mtime/size, so an edited file gets
+    a new cube. The cube of a range is merged from the cubes of its days instead of
+    grouping the whole loaded frame again.
+    """
+
+    def __init__(self, max_days: int = CUBE_CACHE_MAX_DAYS):
+        self.max_days = max_days
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, signature):
+        with self._lock:
+            cube = self._entries.get((path, signature))
+            if cube is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((path, signature))
+            self.hits += 1
+            return cube
+
+    def put(self, path: str, signature, cube: pd.DataFrame):
+        with self._lock:
+            self._entries[(path, signature)] = cube
+            self._entries.move_to_end((path, signature))
+            while len(self._entries) > self.max_days:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "max_days": self.max_days}
+
+
+# Shared by every orchestrator, Streamlit session and benchmark thread of the process
+data_cache = DataFrameCache()
+cube_cache = DayCubeCache()
@@ -1,38 +1,86 @@
 import sys
 import os
+import asyncio
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from typing import Callable
+from typing import Callable, Optional
 import pandas as pd
 from langchain.tools import BaseTool
-from paths import DATA_PATH
+from paths import DATA_PATH, ORDER_STORE_PATH
 from pydantic import PrivateAttr
-from datetime import datetime
+from tools.columnar_store import LOAD_WORKERS, list_day_files, read_days, apply_order_dtypes
+from tools.data_cache import data_cache, cube_cache, fingerprint
+from tools.order_store import OrderStore, get_order_store
 
-def loadData(start_date, end_date):
-    files = os.listdir(DATA_PATH)
-    files_no_ext = [os.path.splitext(f)[0] for f in files]
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
-    filtered_files = []
-    for f in files_no_ext:
-        try:
-            file_date = datetime.strptime(f, "%Y-%m-%d")
-            if start <= file_date <= end:
-                filtered_files.append(f)
-        except ValueError:
-            continue
-    df_list = []
-    for file in filtered_files:
-        temp_df = pd.read_csv(os.path.join(DATA_PATH, (file) + ".csv"))
-        df_list.append(temp_df)
+from tools.chunked_loader import load_within_budget
+from tools.aggregate_cube import rollup, combine, empty_cube
+from memory.data_context import DataContext
+
+# Opt-in: the store keeps every day in memory, outside the DataFrame cache and the chunked budget
+USE_ORDER_STORE = os.getenv("SMARTSCM_USE_ORDER_STORE", "0") == "1"
+CHUNKED_LOADING = os.getenv("SMARTSCM_CHUNKED_LOADING", "0") == "1"
+LOAD_MAX_ROWS = int(os.getenv("SMARTSCM_LOAD_MAX_ROWS", 0)) or None
+LOAD_MAX_BYTES = int(os.getenv("SMARTSCM_LOAD_MAX_BYTES", 0)) or None
+OVER_BUDGET_MODE = os.getenv("SMARTSCM_OVER_BUDGET_MODE", "sample")
+LOAD_COLUMNS = [c.strip() for c in os.getenv("SMARTSCM_LOAD_COLUMNS", "").split(",") if c.strip()] or None
+
+def _read_days(day_files, store_path=ORDER_STORE_PATH, max_workers=LOAD_WORKERS):
+    """
+    Reads the given (day, path) files in parallel and returns the frame with each day's row offsets.
+    The daily rollups of each day are built at the same time and kept in `cube_cache`.
+    """
+    df_list = read_days(day_files, store_path=store_path, max_workers=max_workers)
+    signatures = fingerprint(day_files)
+    offsets = {}
+    row = 0
+    for (day, path), temp_df in zip(day_files, df_list):
+        key = day.strftime("%Y-%m-%d")
+        offsets[key] = (row, row + len(temp_df))
+        row += len(temp_df)
+        cube_cache.put(path, signatures[key], rollup(temp_df))
     if df_list:
         df = pd.concat(df_list, ignore_index=True)
     else:
         df = pd.DataFrame()
     if df.empty:
-        return pd.DataFrame()
-    return df
+        return pd.DataFrame(), offsets
+    # Categories differ between days, so concat falls back to object columns
+    return apply_order_dtypes(df), offsets
+
+def loadData(start_date, end_date, data_path=DATA_PATH, store_path=ORDER_STORE_PATH, use_cache=True, max_workers=LOAD_WORKERS):
+    day_files = list_day_files(start_date, end_date, data_path=data_path)
+    if not use_cache:
+        return _read_days(day_files, store_path, max_workers)[0]
+    return data_cache.get_or_load(
+        data_path, start_date, end_date, day_files, lambda: _read_days(day_files, store_path, max_workers)
+    )
+
+def loadAggregates(start_date=None, end_date=None, data_path=DATA_PATH, store_path=ORDER_STORE_PATH, max_workers=LOAD_WORKERS):
+    """
+    Returns the daily rollups of the orders `loadData` returns for the same dates (every
+    day when the dates are None), merged from the cached cube of each day file. Only days
+    whose cube is missing or stale are read.
+    """
+    day_files = list_day_files(start_date, end_date, data_path=data_path)
+    signatures = fingerprint(day_files)
+    cubes = {}
+    missing = []
+    for day, path in day_files:
+        key = day.strftime("%Y-%m-%d")
+        cubes[key] = cube_cache.get(path, signatures[key])
+        if cubes[key] is None:
+            missing.append((day, path))
+    # One batch of days in memory at a time, so a cold build of a long range does not hold every day
+    batch_size = max(max_workers, 1)
+    for i in range(0, len(missing), batch_size):
+        batch = missing[i:i + batch_size]
+        for (day, path), frame in zip(batch, read_days(batch, store_path=store_path, max_workers=max_workers)):
+            key = day.strftime("%Y-%m-%d")
+            cubes[key] = rollup(frame)
+            cube_cache.put(path, signatures[key], cubes[key])
+    if not cubes:
+        return empty_cube()
+    return combine([cubes[key] for key in sorted(cubes)])
 
 class DataLoadingTool(BaseTool):
     name: str = "data_loader"
@@ -48,21 +96,101 @@ class DataLoadingTool(BaseTool):
     )
 
     _set_df_callback: Callable[[pd.DataFrame], None] = PrivateAttr()
+    _store: Optional[OrderStore] = PrivateAttr(default=None)
+    _use_store: bool = PrivateAttr(default=True)
+    _chunked: bool = PrivateAttr(default=False)
+    _max_rows: Optional[int] = PrivateAttr(default=None)
+    _max_bytes: Optional[int] = PrivateAttr(default=None)
+    _over_budget: str = PrivateAttr(default="sample")
+    _columns: Optional[list] = PrivateAttr(default=None)
+    _context: Optional[DataContext] = PrivateAttr(default=None)
 
-    def __init__(self, set_df_callback: Callable[[pd.DataFrame], None], **kwargs):
+    def __init__(
+        self,
+        set_df_callback: Callable[[pd.DataFrame], None],
+        store: Optional[OrderStore] = None,
+        use_store: bool = USE_ORDER_STORE,
+        chunked: bool = CHUNKED_LOADING,
+        max_rows: Optional[int] = LOAD_MAX_ROWS,
+        max_bytes: Optional[int] = LOAD_MAX_BYTES,
+        over_budget: str = OVER_BUDGET_MODE,
+        columns: Optional[list] = LOAD_COLUMNS,
+        context: Optional[DataContext] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            set_df_callback: Receives the loaded DataFrame.
+            store: Order store to slice ranges from, defaults to the process-wide one.
+            use_store: Slice the in-memory order store instead of reading the files.
+            chunked: Stream the day files one at a time under the row/byte budget instead
+                of holding every day in memory. Meant for ranges larger than memory.
+            max_rows, max_bytes: Budget of the chunked mode.
+            over_budget: What the chunked mode returns past the budget, "sample" or "aggregate".
+            columns: Columns read by the chunked mode, all of them when None.
+            context: Session data context. When given, the loaded frame is stored in it and a
+                request for the range it already holds (with unchanged day files) is not reloaded.
+        """
         super().__init__(**kwargs)
         self._set_df_callback = set_df_callback
+        self._store = store
+        self._use_store = use_store
+        self._chunked = chunked
+        self._max_rows = max_rows
+        self._max_bytes = max_bytes
+        self._over_budget = over_budget
+        self._columns = columns
+        self._context = context
+
+    def _load(self, start_date: str, end_date: str):
+        """Returns the frame, the restriction message of the chunked mode, and a loader of the daily rollups."""
+        if self._chunked:
+            df, message = load_within_budget(
+                start_date,
+                end_date,
+                max_rows=self._max_rows,
+                max_bytes=self._max_bytes,
+                mode=self._over_budget,
+                columns=self._columns,
+            )
+            # Rollups of a sample or of aggregates would not describe every order
+            return df, message, (lambda: rollup(df)) if message is None else (lambda: None)
+        if not self._use_store:
+            df = loadData(start_date, end_date)
+            return df, None, lambda: loadAggregates(start_date, end_date)
+        store = self._store if self._store is not None else get_order_store()
+        return store.get_range(start_date, end_date), None, lambda: store.get_aggregates(start_date, end_date)
+
+    def _source(self, start_date: str, end_date: str) -> dict:
+        # The chunked mode may sample or aggregate, so its frames only match themselves
+        return {
+            "start": start_date,
+            "end": end_date,
+            "files": fingerprint(list_day_files(start_date, end_date)),
+            "mode": (self._over_budget, self._max_rows, self._max_bytes, self._columns) if self._chunked else "full",
+        }
 
     def _run(self, query) -> str:
         try:
             start_date, end_date = query.split(",")
             start_date = start_date.strip()
             end_date = end_date.strip()
-            df = loadData(start_date, end_date)
+            context = self._context
+            source = self._source(start_date, end_date) if context is not None else None
+            if context is not None and context.matches(source):
+                return f"Data for {start_date} to {end_date} is already loaded ({context.describe()}), reusing it."
+            df, message, aggregates = self._load(start_date, end_date)
+            if context is not None:
+                context.set(df, source=source, aggregates=aggregates())
             self._set_df_callback(df)
-            return "Data loaded successfully"
+            loaded = f" ({context.describe()})" if context is not None else ""
+            if message:
+                return f"Data loaded with restrictions{loaded}.\n{message}"
+            return f"Data loaded successfully{loaded}"
         except Exception as e:
             return f"Failed to load data: {e}"
 
-    async def _arun(self) -> str:
-        return self._run()
\ No newline at end of file
+    async def _arun(self, query) -> str:
+        # File reads and concatenation stay off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._run, query)
@@ -1,42 +1,118 @@
+import atexit
 import json
 import os
+import multiprocessing
+import re
+import time
+import hashlib
+import threading
 from langchain.tools import BaseTool
 from paths import BASE_DIR
-from pydantic import BaseModel, Field
-import matplotlib.pyplot as plt
+from pydantic import BaseModel, Field, PrivateAttr
 import io
 import base64
-from typing import List
-import uuid
+from typing import Any, Callable, List, Optional, Union, BinaryIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
 import matplotlib
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from tools.chart_downsampling import MAX_CHART_POINTS, BAR_TOP_N, PIE_TOP_N, downsample, fold_top_n, is_ordered_axis
 
 matplotlib.use('Agg')
 
+STATIC_DIR = os.path.join(BASE_DIR, "streamlit", ".streamlit", "static")
+STATIC_URL = os.getenv("SMARTSCM_STATIC_URL", "http://localhost:8000")
+CHART_FORMAT = os.getenv("SMARTSCM_CHART_FORMAT", "png")
+# WebP needs Pillow, which matplotlib uses for raster formats other than PNG
+CHART_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "webp": "image/webp"}
+# Eviction of the static folder: charts unused for STATIC_MAX_AGE seconds, then the least
+# recently used ones past STATIC_MAX_BYTES, checked at most every STATIC_EVICT_INTERVAL seconds
+STATIC_MAX_BYTES = int(os.getenv("SMARTSCM_STATIC_MAX_BYTES", 200 * 1024 * 1024))
+STATIC_MAX_AGE = float(os.getenv("SMARTSCM_STATIC_MAX_AGE", 7 * 24 * 3600))
+STATIC_EVICT_INTERVAL = float(os.getenv("SMARTSCM_STATIC_EVICT_INTERVAL", 60))
+# Chart files written by this tool: content hashes, and the uuid names of older versions
+CHART_FILE = re.compile(r"^[0-9a-f-]{24,36}\.(png|svg|webp)$")
+
+_chart_stats = {"hits": 0, "misses": 0, "evicted_files": 0, "evicted_bytes": 0}
+_chart_lock = threading.Lock()
+_last_eviction = 0.0
+
+# Read once from the style library instead of applying the style sheet to the global rcParams
+STYLE_PROP_CYCLE = matplotlib.style.library.get("seaborn-v0_8-colorblind", {}).get("axes.prop_cycle")
+# Render in worker processes instead of the calling thread, 0 renders inline
+CHART_PROCESSES = int(os.getenv("SMARTSCM_CHART_PROCESSES", 0))
+# "spawn" is safe in the threaded web server; "fork" starts faster but copies the locks of running threads
+CHART_START_METHOD = os.getenv("SMARTSCM_CHART_START_METHOD", "spawn")
+_pool = None
+
 class DataVizInput(BaseModel):
     type: str = Field(..., description="Type of plot: 'line', 'bar', or 'scatter'")
     x: str = Field(..., description="Label for the x-axis")
     y: str = Field(..., description="Label for the y-axis")
-    x_data: List = Field(..., description="List of data for x-axis")
-    y_data: List = Field(..., description="List of data for y-axis")
+    x_data: Optional[List] = Field(None, description="List of data for x-axis (omit when using `source`)")
+    y_data: Optional[List] = Field(None, description="List of data for y-axis (omit when using `source`)")
+    source: Optional[str] = Field(
+        None,
+        description="Instead of x_data/y_data: name of the loaded DataFrame (`df`) or of a DataFrame/Series "
+        "computed by the pandas agent, whose data is plotted without copying it into the input",
+    )
+    x_column: Optional[str] = Field(None, description="Column of `source` for the x-axis, its index when omitted")
+    y_column: Optional[Union[str, List[str]]] = Field(
+        None, description="Column(s) of `source` for the y-axis, one series per column (not needed for a Series)"
+    )
 
 
 class OneInputSchema(BaseModel):
     input: DataVizInput
 
 
-def data_vizualization(type: str, x: str, y: str, x_data, y_data, labels=None) -> str:
-    plt.style.use("seaborn-v0_8-colorblind")  # Nice color palette
-    plt.figure(figsize=(12, 7))  # Bigger image
+def render_chart(
+    type: str,
+    x: str,
+    y: str,
+    x_data,
+    y_data,
+    output: Union[str, BinaryIO],
+    labels=None,
+    format: str = "png",
+) -> Optional[str]:
+    """
+    Renders the chart straight to `output`, a file path or a binary buffer, as PNG, SVG or WebP.
 
+    The figure is built with the object-oriented API on its own Agg canvas and the
+    style is applied to its axes, so concurrent calls share no pyplot or rcParams state.
+
+    Returns:
+        Optional[str]: An error message when the chart cannot be drawn, None otherwise.
+    """
+    if format not in CHART_FORMATS:
+        return f"Unsupported image format: {format}"
+    if type not in ("line", "bar", "scatter", "pie"):
+        return f"Unsupported plot type: {type}"
+
+    if not x_data or not y_data:
+        return "No data to plot: x_data and y_data are empty."
     is_multi = isinstance(y_data[0], (list, tuple))
+    if type == "pie" and is_multi:
+        return "Pie chart does not support multiple data series."
+
+    fig = Figure(figsize=(12, 7))  # Bigger image
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    if STYLE_PROP_CYCLE is not None:
+        ax.set_prop_cycle(STYLE_PROP_CYCLE)  # Nice color palette
 
     if type == "line":
         if is_multi:
             for idx, series in enumerate(y_data):
                 label = labels[idx] if labels else f"Series {idx+1}"
-                plt.plot(x_data, series, label=label, marker="o", linewidth=2)
+                ax.plot(x_data, series, label=label, marker="o", linewidth=2)
         else:
-            plt.plot(
+            ax.plot(
                 x_data,
                 y_data,
                 label=labels[0] if labels else y,
@@ -46,31 +122,28 @@ def data_vizualization(type: str, x: str, y: str, x_data, y_data, labels=None) -
 
     elif type == "bar":
         if is_multi:
-            import numpy as np
-
             width = 0.8 / len(y_data)
             x_indexes = np.arange(len(x_data))
             for idx, series in enumerate(y_data):
                 offset = (idx - len(y_data) / 2) * width + width / 2
                 label = labels[idx] if labels else f"Series {idx+1}"
-                plt.bar(x_indexes + offset, series, width=width, label=label)
-            plt.xticks(x_indexes, x_data, fontsize=11)
+                ax.bar(x_indexes + offset, series, width=width, label=label)
+            ax.set_xticks(x_indexes)
+            ax.set_xticklabels(x_data, fontsize=11)
         else:
-            plt.bar(x_data, y_data, label=labels[0] if labels else y)
+            ax.bar(x_data, y_data, label=labels[0] if labels else y)
 
     elif type == "scatter":
         if is_multi:
             for idx, series in enumerate(y_data):
                 label = labels[idx] if labels else f"Series {idx+1}"
-                plt.scatter(x_data, series, label=label, s=80, edgecolors="k")
+                ax.scatter(x_data, series, label=label, s=80, edgecolors="k")
         else:
-            plt.scatter(
+            ax.scatter(
                 x_data, y_data, label=labels[0] if labels else y, s=80, edgecolors="k"
             )
 
     elif type == "pie":
-        if is_multi:
-            return "Pie chart does not support multiple data series."
         def make_autopct(values):
                     def my_autopct(pct):
                         total = sum(values)
@@ -81,7 +154,7 @@ def data_vizualization(type: str, x: str, y: str, x_data, y_data, labels=None) -
 
         explode = [0.05] * len(y_data)
         colors = ["#66c2a5", "#fc8d62", "#8da0cb", "#e78ac3", "#a6d854", "#ffd92f"]
-        plt.pie(
+        ax.pie(
                 y_data,
                 labels=x_data,
                 autopct=make_autopct(y_data),
@@ -91,29 +164,271 @@ def data_vizualization(type: str, x: str, y: str, x_data, y_data, labels=None) -
                 textprops={"fontsize": 12},
             )
 
-    else:
-        return f"Unsupported plot type: {type}"
-
     if type != "pie":
-        plt.xlabel(x, fontsize=13)
-        plt.ylabel(y, fontsize=13)
-        plt.title(
+        ax.set_xlabel(x, fontsize=13)
+        ax.set_ylabel(y, fontsize=13)
+        ax.set_title(
             f"{type.capitalize()} Plot of {y} vs {x}", fontsize=16, fontweight="bold"
         )
-        plt.grid(True, linestyle="--", linewidth=0.5, alpha=0.7)
-        plt.legend(fontsize=11)
-        plt.xticks(fontsize=11)
-        plt.yticks(fontsize=11)
+        ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.7)
+        ax.legend(fontsize=11)
+        ax.tick_params(labelsize=11)
+
+    fig.tight_layout()  # Avoid clipping
+    fig.savefig(output, format=format)
+    return None
+
+
+def _render_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    The chart worker pool, started on first use and shut down at exit.
 
-    plt.tight_layout()  # Avoid clipping
+    Spawned workers unpickle `render_chart` by importing this module, which works because
+    multiprocessing gives them the parent's `sys.path` (with `src` on it).
+    """
+    global _pool
+    if CHART_PROCESSES <= 0:
+        return None
+    if _pool is None:
+        with _chart_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=CHART_PROCESSES, mp_context=multiprocessing.get_context(CHART_START_METHOD)
+                )
+                atexit.register(_pool.shutdown)
+    return _pool
 
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drops a broken pool, the next chart starts a new one."""
+    global _pool
+    with _chart_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _render(args: tuple) -> Optional[str]:
+    """Renders in the worker pool when there is one, inline otherwise or when a worker died."""
+    pool = _render_pool()
+    if pool is None:
+        return render_chart(*args)
+    try:
+        # The worker writes the file itself, only the input and the error message are pickled
+        return pool.submit(render_chart, *args).result()
+    except BrokenProcessPool as e:
+        print(f"⚠️ Chart worker pool broke ({e}), rendering inline")
+        _discard_pool(pool)
+        return render_chart(*args)
+
+
+def data_vizualization(type: str, x: str, y: str, x_data, y_data, labels=None, format: str = "png") -> str:
+    """Renders the chart in memory and returns it as a base64 data URI (or an error message)."""
     buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    plt.close()
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
+    error = render_chart(type, x, y, x_data, y_data, buf, labels=labels, format=format)
+    if error:
+        return error
+    img_base64 = base64.b64encode(buf.getvalue()).decode("utf-8")
+
+    return f"data:{CHART_FORMATS[format]};base64,{img_base64}"
+
+
+def chart_key(parsed_input_data: dict, format: str) -> str:
+    """Hash of the normalized chart input: identical charts get the same file name."""
+    normalized = {
+        "type": str(parsed_input_data["type"]).strip().lower(),
+        "x": parsed_input_data["x"],
+        "y": parsed_input_data["y"],
+        "x_data": parsed_input_data["x_data"],
+        "y_data": parsed_input_data["y_data"],
+        "labels": parsed_input_data.get("labels"),
+        "format": format,
+    }
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
 
-    return f"data:image/png;base64,{img_base64}"
+def evict_static_dir(
+    output_dir: str = STATIC_DIR,
+    max_bytes: int = STATIC_MAX_BYTES,
+    max_age: Optional[float] = STATIC_MAX_AGE,
+) -> int:
+    """
+    Deletes chart files last used more than `max_age` seconds ago, then the least recently
+    used ones until the charts take at most `max_bytes`. Other files are left alone.
+
+    Returns:
+        int: The number of deleted files.
+    """
+    now = time.time()
+    charts = []
+    try:
+        entries = list(os.scandir(output_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if entry.is_file() and CHART_FILE.match(entry.name):
+            stat = entry.stat()
+            charts.append((stat.st_mtime, stat.st_size, entry.path))
+    charts.sort()
+    total = sum(size for _, size, _ in charts)
+    deleted = 0
+    freed = 0
+    for mtime, size, path in charts:
+        too_old = max_age is not None and now - mtime > max_age
+        if not too_old and total - freed <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        deleted += 1
+        freed += size
+    with _chart_lock:
+        _chart_stats["evicted_files"] += deleted
+        _chart_stats["evicted_bytes"] += freed
+    return deleted
+
+
+def _maybe_evict(output_dir: str):
+    global _last_eviction
+    with _chart_lock:
+        if time.monotonic() - _last_eviction < STATIC_EVICT_INTERVAL:
+            return
+        _last_eviction = time.monotonic()
+    evict_static_dir(output_dir)
+
+
+def chart_cache_stats() -> dict:
+    with _chart_lock:
+        return dict(_chart_stats)
+
+
+def save_chart(parsed_input_data: dict, output_dir: str = STATIC_DIR, format: str = CHART_FORMAT) -> tuple:
+    """
+    Renders the chart described by the tool input into `output_dir`.
+
+    Files are named by a hash of the chart input, so a chart that was already rendered
+    is returned without drawing it again (its mtime is refreshed, which marks it as
+    recently used for `evict_static_dir`). New images are written to a temporary name
+    and moved in place once complete, so the static file server never serves a
+    partially written chart.
+
+    Returns:
+        tuple: (file name, None) on success, or (None, error message).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"{chart_key(parsed_input_data, format)}.{format}"
+    output_path = os.path.join(output_dir, name)
+    try:
+        os.utime(output_path)
+        with _chart_lock:
+            _chart_stats["hits"] += 1
+        return name, None
+    except FileNotFoundError:
+        with _chart_lock:
+            _chart_stats["misses"] += 1
+    _maybe_evict(output_dir)
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        args = (
+            parsed_input_data["type"],
+            parsed_input_data["x"],
+            parsed_input_data["y"],
+            parsed_input_data["x_data"],
+            parsed_input_data["y_data"],
+            tmp_path,
+            parsed_input_data.get("labels"),
+            format,
+        )
+        error = _render(args)
+        if error:
+            return None, error
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return name, None
+
+
+def _to_list(values) -> list:
+    if isinstance(values, pd.MultiIndex):
+        return [" / ".join(str(level) for level in key) for key in values]
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime("%Y-%m-%d").tolist()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.astype(str).tolist()
+    return values.tolist()
+
+
+def resolve_chart_data(parsed_input_data: dict, resolve_source: Optional[Callable[[str], Any]]) -> tuple:
+    """
+    Fills x_data/y_data from the frame named by `source`, when the input references one.
+
+    Returns:
+        tuple: (input with x_data and y_data, None), or (None, error message).
+    """
+    source = parsed_input_data.get("source")
+    if not source:
+        if parsed_input_data.get("x_data") is None or parsed_input_data.get("y_data") is None:
+            return None, "Provide either x_data and y_data, or a `source` DataFrame with x_column/y_column."
+        return parsed_input_data, None
+    data = resolve_source(source) if resolve_source is not None else None
+    if data is None:
+        return None, f"Unknown source `{source}`: use `df` or the name of a DataFrame/Series computed by the pandas agent."
+    if isinstance(data, (pd.DataFrame, pd.Series)) and data.empty:
+        return None, f"`{source}` is empty, there is nothing to plot."
+
+    resolved = dict(parsed_input_data)
+    if isinstance(data, pd.Series):
+        resolved["x_data"] = _to_list(data.index)
+        resolved["y_data"] = _to_list(data)
+        return resolved, None
+
+    x_column = parsed_input_data.get("x_column")
+    y_columns = parsed_input_data.get("y_column")
+    if not y_columns:
+        return None, f"`y_column` is required for the DataFrame `{source}`, its columns are: {list(data.columns)}"
+    y_columns = [y_columns] if isinstance(y_columns, str) else list(y_columns)
+    missing = [c for c in y_columns + ([x_column] if x_column else []) if c not in data.columns]
+    if missing:
+        return None, f"`{source}` has no column {missing}, its columns are: {list(data.columns)}"
+    resolved["x_data"] = _to_list(data[x_column]) if x_column else _to_list(data.index)
+    if len(y_columns) == 1:
+        resolved["y_data"] = _to_list(data[y_columns[0]])
+    else:
+        resolved["y_data"] = [_to_list(data[column]) for column in y_columns]
+        resolved.setdefault("labels", y_columns)
+    return resolved, None
+
+
+def reduce_chart_data(parsed_input_data: dict, max_points: int = MAX_CHART_POINTS) -> tuple:
+    """
+    Downsamples line/scatter series above `max_points` points and folds the smallest pie
+    slices, and bars over categories, into "Other". Bars over dates or numbers are kept
+    as they are: an "Other" month would mean nothing.
+
+    Returns:
+        tuple: (input, note describing the reduction or None).
+
+    Raises:
+        ValueError: If the y values are not numbers.
+    """
+    chart_type = str(parsed_input_data["type"]).strip().lower()
+    x_data, y_data = parsed_input_data["x_data"], parsed_input_data["y_data"]
+    if chart_type in ("line", "scatter"):
+        reduced_x, reduced_y = downsample(x_data, y_data, max_points=max_points)
+        note = f"downsampled from {len(x_data)} to {len(reduced_x)} points"
+    elif chart_type == "pie" or (chart_type == "bar" and not is_ordered_axis(x_data)):
+        top_n = BAR_TOP_N if chart_type == "bar" else PIE_TOP_N
+        reduced_x, reduced_y = fold_top_n(x_data, y_data, top_n)
+        note = f"kept the {len(reduced_x) - 1} largest of {len(x_data)} categories, the rest is shown as \"Other\""
+    else:
+        return parsed_input_data, None
+    if len(reduced_x) == len(x_data):
+        return parsed_input_data, None
+    return dict(parsed_input_data, x_data=reduced_x, y_data=reduced_y), note
 
 
 class DataVisualizationTool(BaseTool):
@@ -127,41 +442,62 @@ class DataVisualizationTool(BaseTool):
         "- 'bar': Plots single or grouped bar charts. Grouped bars are handled if multiple y-series are given.\n"
         "- 'scatter': Plots single or multiple y-series as scatter points.\n"
         "- 'pie': Plots a pie chart using x_data as labels and y_data as values. Only supports a single series.\n\n"
+        "Data:\n"
+        "- Instead of copying values into x_data/y_data, set `source` to `df` or to the name of a DataFrame/Series "
+        "computed by the pandas agent, with `x_column` (the index when omitted) and `y_column`.\n"
+        "- Long line/scatter series are downsampled and small bars/pie slices are grouped into \"Other\".\n\n"
         "Styling:\n"
         "- Uses the 'seaborn-colorblind' palette for accessibility.\n"
         "- Applies gridlines, legend, labeled axes, and formatted title for non-pie charts.\n"
         "- Pie charts include percentage and absolute values with color-coded segments.\n\n"
         "Output:\n"
-        "- The resulting plot is rendered and saved as a PNG file.\n"
-        "- The image is saved to a temporary folder ('../temp') with a unique UUID-based filename.\n"
-        "- The full path to the saved image file is returned as the result.\n"
+        "- The resulting plot is rendered and saved as an image file (PNG by default).\n"
+        "- The image is saved to the static folder served by the app with a unique filename.\n"
+        "- The URL of the saved image file is returned as the result.\n"
     )
 
+    image_format: str = CHART_FORMAT  # "png", "svg" or "webp"
+    output_dir: str = STATIC_DIR
+    return_data_uri: bool = False  # Return the image inline instead of saving it
+    max_points: int = MAX_CHART_POINTS
+
+    _resolve_source: Optional[Callable[[str], Any]] = PrivateAttr(default=None)
+
+    def __init__(self, resolve_source: Optional[Callable[[str], Any]] = None, **kwargs):
+        """
+        Args:
+            resolve_source: Returns the DataFrame/Series named by the `source` of a chart
+                input, or None when there is no such frame.
+        """
+        super().__init__(**kwargs)
+        self._resolve_source = resolve_source
+
     def _run(self, input) -> str:
         parsed_input_data = input if isinstance(input, dict) else json.loads(input)
         if "input" in parsed_input_data:
             parsed_input_data = parsed_input_data["input"]
-        image = data_vizualization(
-            parsed_input_data["type"],
-            parsed_input_data["x"],
-            parsed_input_data["y"],
-            parsed_input_data["x_data"],
-            parsed_input_data["y_data"],
-        )
-        _, encoded = image.split(",", 1)
-
-        # Decode the base64 string
-        image_data = base64.b64decode(encoded)
-
-        # Write the image to a file
-        # Ensure the directory exists
-        output_dir = os.path.join(BASE_DIR,"streamlit",".streamlit","static")
-        os.makedirs(output_dir, exist_ok=True)
-
-        # Write the image to a file
-        output_image = str(uuid.uuid4())  # Generate a random unique name
-        output_path = os.path.join(output_dir, f"{output_image}.png")
-        with open(output_path, "wb") as f:
-            f.write(image_data)
+        parsed_input_data, error = resolve_chart_data(parsed_input_data, self._resolve_source)
+        if error:
+            return error
+        try:
+            parsed_input_data, note = reduce_chart_data(parsed_input_data, max_points=self.max_points)
+        except ValueError as e:
+            return f"Invalid chart data: {e}"
+        if self.return_data_uri:
+            return data_vizualization(
+                parsed_input_data["type"],
+                parsed_input_data["x"],
+                parsed_input_data["y"],
+                parsed_input_data["x_data"],
+                parsed_input_data["y_data"],
+                labels=parsed_input_data.get("labels"),
+                format=self.image_format,
+            )
 
-        return f"Image saved to http://localhost:8000/{output_image}.png"
+        # The figure is written straight to the static folder, without an in-memory copy
+        name, error = save_chart(parsed_input_data, output_dir=self.output_dir, format=self.image_format)
+        if error:
+            return error
+        if note:
+            return f"Image saved to {STATIC_URL}/{name} ({note})"
+        return f"Image saved to {STATIC_URL}/{name}"
@@ -0,0 +1,14 @@
+import pandas as pd
+
+
+def markdown_table(df: pd.DataFrame, index: bool = False) -> str:
+    """Renders a frame as a Markdown table, without requiring `tabulate`."""
+    if index:
+        df = df.reset_index()
+    try:
+        return df.to_markdown(index=False)
+    except ImportError:
+        header = "| " + " | ".join(str(column) for column in df.columns) + " |"
+        separator = "| " + " | ".join("---" for _ in df.columns) + " |"
+        rows = ["| " + " | ".join(str(value) for value in row) + " |" for row in df.itertuples(index=False)]
+        return "\n".join([header, separator] + rows)
@@ -0,0 +1,186 @@
+import os
+import time
+import threading
+from bisect import bisect_left, bisect_right
+import pandas as pd
+from paths import DATA_PATH, ORDER_STORE_PATH
+from tools.columnar_store import DATE_FORMAT, normalize_date, list_day_files, read_days, apply_order_dtypes, handoff, drop_unused_categories
+from tools.data_cache import fingerprint
+from tools.aggregate_cube import rollup, combine, empty_cube
+
+POLL_INTERVAL = float(os.getenv("SMARTSCM_STORE_POLL_SECONDS", 30))
+
+
+class OrderStore:
+    """
+    Long-lived in-memory index of every daily order file.
+
+    All days are read once; afterwards `refresh` only reads day files that are new or
+    whose mtime/size changed. Rows are kept in one frame ordered by day, with the first
+    row of each day in a sorted index, so a range request is a slice whose cost depends
+    on the rows in the range and not on the number of files on disk.
+
+    Each day also keeps its daily rollups (see `aggregate_cube`), computed when the day
+    is read, so `get_aggregates` only merges the small per-day cubes of a range.
+    """
+
+    def __init__(self, data_path: str = DATA_PATH, store_path: str = ORDER_STORE_PATH, poll_interval: float = POLL_INTERVAL):
+        self.data_path = data_path
+        self.store_path = store_path
+        self.poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._days = []
+        self._row_starts = [0]
+        self._files = {}
+        self._cubes = {}
+        self.version = 0
+        self._df = pd.DataFrame()
+        self._last_poll = 0.0
+        self._watcher = None
+        self.refresh()
+
+    @property
+    def days(self) -> list:
+        with self._lock:
+            return list(self._days)
+
+    @property
+    def row_count(self) -> int:
+        with self._lock:
+            return len(self._df)
+
+    def _day_frames(self) -> dict:
+        return {
+            day: self._df.iloc[self._row_starts[i]:self._row_starts[i + 1]]
+            for i, day in enumerate(self._days)
+        }
+
+    def refresh(self) -> int:
+        """
+        Reads new or changed day files and drops days whose file was removed.
+
+        Returns:
+            int: The number of day files read.
+        """
+        day_files = list_day_files(data_path=self.data_path)
+        current = fingerprint(day_files)
+        with self._lock:
+            self._last_poll = time.monotonic()
+            changed = [
+                (day, path) for day, path in day_files
+                if self._files.get(day.strftime(DATE_FORMAT)) != current[day.strftime(DATE_FORMAT)]
+            ]
+            removed = set(self._files) - set(current)
+            if not changed and not removed:
+                return 0
+
+            new_frames = {
+                day.strftime(DATE_FORMAT): frame
+                for (day, _), frame in zip(changed, read_days(changed, store_path=self.store_path))
+            }
+            appended_only = not removed and (
+                not self._days or min(new_frames) > self._days[-1]
+            )
+            if appended_only:
+                # Fast path: today's file landed after every known day
+                frames = [self._df] + [new_frames[day] for day in sorted(new_frames)]
+                days = self._days + sorted(new_frames)
+                sizes = [len(new_frames[day]) for day in sorted(new_frames)]
+                row_starts = list(self._row_starts)
+                for size in sizes:
+                    row_starts.append(row_starts[-1] + size)
+            else:
+                day_frames = self._day_frames()
+                day_frames.update(new_frames)
+                for day in removed:
+                    day_frames.pop(day, None)
+                days = sorted(day_frames)
+                frames = [day_frames[day] for day in days]
+                row_starts = [0]
+                for frame in frames:
+                    row_starts.append(row_starts[-1] + len(frame))
+
+            frames = [frame for frame in frames if not frame.empty]
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            self._df = apply_order_dtypes(df)
+            self._days = days
+            self._row_starts = row_starts
+            self._files = current
+            for day in removed:
+                self._cubes.pop(day, None)
+            self._cubes.update({day: rollup(frame) for day, frame in new_frames.items()})
+            self.version += 1
+            return len(changed)
+
+    def refresh_if_due(self):
+        """Refreshes the store when no watcher runs and the poll interval has elapsed."""
+        if self._watcher is None and time.monotonic() - self._last_poll >= self.poll_interval:
+            self.refresh()
+
+    def start_watching(self):
+        """Polls the data directory in a daemon thread instead of on access."""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"⚠️ Order store refresh failed: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="order-store-watcher", daemon=True)
+        self._watcher.start()
+
+    def get_range(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """Returns the orders of the day files between the two YYYY-MM-DD dates (inclusive)."""
+        start, end = normalize_date(start_date), normalize_date(end_date)
+        self.refresh_if_due()
+        with self._lock:
+            first = bisect_left(self._days, start)
+            last = bisect_right(self._days, end)
+            if first >= last:
+                return pd.DataFrame()
+            df = self._df.iloc[self._row_starts[first]:self._row_starts[last]]
+        if df.empty:
+            return pd.DataFrame()
+        return drop_unused_categories(handoff(df.reset_index(drop=True)))
+
+
+    def get_all(self) -> pd.DataFrame:
+        """Returns every order of the store."""
+        return self.snapshot()[0]
+
+    def snapshot(self) -> tuple:
+        """Returns every order of the store with the version they belong to."""
+        self.refresh_if_due()
+        with self._lock:
+            df, version = self._df, self.version
+        return handoff(df), version
+
+    def get_aggregates(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """Returns the daily rollups of the orders `get_range` returns for the same dates."""
+        start, end = normalize_date(start_date), normalize_date(end_date)
+        self.refresh_if_due()
+        with self._lock:
+            first = bisect_left(self._days, start)
+            last = bisect_right(self._days, end)
+            cubes = [self._cubes[day] for day in self._days[first:last]]
+        if not cubes:
+            return empty_cube()
+        return combine(cubes)
+
+
+_order_store = None
+_order_store_lock = threading.Lock()
+
+
+def get_order_store() -> OrderStore:
+    """Returns the process-wide order store, loading every day file on first use."""
+    global _order_store
+    if _order_store is None:
+        with _order_store_lock:
+            if _order_store is None:
+                _order_store = OrderStore()
+    return _order_store
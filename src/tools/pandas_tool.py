@@ -1,8 +1,11 @@
+import threading
 from langchain.tools import BaseTool
-from typing import Optional, Callable
+from typing import Optional, Callable, Any
 from pydantic import PrivateAttr
 import pandas as pd
 from agents.pandas_agent import PandasAgent
+from memory.data_context import DataContext
+from memory.result_registry import ResultRegistry
 
 
 class PandasTool(BaseTool):
@@ -10,33 +13,116 @@ class PandasTool(BaseTool):
     description: str = (
         "Use this tool to ask natural language questions about a Pandas DataFrame. "
         "Provide a callback function that returns the DataFrame to analyze. "
-        "The tool will use a language model to interpret and execute your query."
+        "The tool will use a language model to interpret and execute your query. "
+        "Variables computed by previous questions on the same data stay available. "
+        # No braces here: the agent prompt is a template that would read them as variables
+        "The agent can publish result tables by name: plot them with data_vizualization using `source` "
+        "and copy the table placeholder it returns into the final answer instead of copying their values."
     )
 
     _df_callback: Optional[Callable[[], pd.DataFrame]] = PrivateAttr(default=None)
+    _context: Optional[DataContext] = PrivateAttr(default=None)
+    _results: Optional[ResultRegistry] = PrivateAttr(default=None)
+    _agent: Optional[PandasAgent] = PrivateAttr(default=None)
+    _agent_key: Any = PrivateAttr(default=None)
+    _agent_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
     variant: str = "default"  # Default variant for the agent
     def __init__(
-        self, df_callback: Optional[Callable[[], pd.DataFrame]] = None,verbose=False,variant="default",**kwargs
+        self,
+        df_callback: Optional[Callable[[], pd.DataFrame]] = None,
+        verbose=False,
+        variant="default",
+        context: Optional[DataContext] = None,
+        results: Optional[ResultRegistry] = None,
+        **kwargs
     ):
+        """
+        Args:
+            df_callback: Returns the DataFrame to analyze.
+            context: Session data context. When given, the agent (and its REPL variables) is
+                kept while the context's version does not change, instead of being keyed by
+                the identity of the frame returned by `df_callback`.
+            results: Session result registry the agent publishes its results to.
+        """
         super().__init__(**kwargs)
         self._df_callback = df_callback
+        self._context = context
+        self._results = results
         self.verbose = verbose
         self.variant = variant
 
+    def _get_agent(self) -> Optional[PandasAgent]:
+        """
+        Returns the agent of the current DataFrame, creating it when the data changed.
+
+        The agent, its executor and its python REPL namespace are reused across calls,
+        so later sub-questions can build on intermediates computed by earlier ones.
+        """
+        with self._agent_lock:
+            if self._context is not None:
+                key = self._context.version
+                if self._agent is not None and self._agent_key == key:
+                    return self._agent
+                df = self._df_callback()
+            else:
+                df = self._df_callback()
+                key = None
+                if self._agent is not None and self._agent.df is df:
+                    return self._agent
+            if df is None:
+                self._agent = None
+                self._agent_key = None
+                return None
+            aggregates = self._context.aggregates if self._context is not None else None
+            self._agent = PandasAgent(
+                df, verbose=self.verbose, variant=self.variant, aggregates=aggregates, results=self._results
+            )
+            self._agent_key = key
+            return self._agent
+
+    def lookup(self, name: str):
+        """Returns a DataFrame or Series computed in the current agent's REPL, or None."""
+        with self._agent_lock:
+            agent = self._agent
+        return agent.lookup(name) if agent is not None else None
+
+    def reset(self):
+        """Drops the cached agent and its REPL variables."""
+        with self._agent_lock:
+            self._agent = None
+            self._agent_key = None
+
+    @staticmethod
+    def _output(result) -> str:
+        # The executor's dict also echoes the input, which carries the REPL instructions
+        if isinstance(result, dict) and "output" in result:
+            return str(result["output"])
+        return str(result)
+
     def _run(self, query: str) -> str:
         if self._df_callback is None:
             return "No DataFrame callback provided. Please set a callback first."
 
         try:
-            df = self._df_callback()
-            if df is None:
+            agent = self._get_agent()
+            if agent is None:
                 return "Callback did not return a valid DataFrame."
 
-            agent = PandasAgent(df,verbose=self.verbose,variant=self.variant)
             result = agent.invoke(query)
-            return str(result)
+            return self._output(result)
         except Exception as e:
             return f"Error executing query: {str(e)}"
 
     async def _arun(self, query: str) -> str:
-        return self._run(query)
+        if self._df_callback is None:
+            return "No DataFrame callback provided. Please set a callback first."
+
+        try:
+            agent = self._get_agent()
+            if agent is None:
+                return "Callback did not return a valid DataFrame."
+
+            result = await agent.ainvoke(query)
+            return self._output(result)
+        except Exception as e:
+            return f"Error executing query: {str(e)}"
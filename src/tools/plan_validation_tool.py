@@ -1,7 +1,26 @@
-from typing import Callable
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
 from langchain.tools import BaseTool
 from pydantic import PrivateAttr
-from agents.planning_validator_agent import PlanValidatorAgent
+from agents.planning_validator_agent import get_plan_validator
+
+VERDICT_CACHE_SIZE = 512
+
+# Verdicts shared by every orchestrator of the process, keyed by _verdict_key
+_verdict_cache = OrderedDict()
+_verdict_cache_lock = threading.Lock()
+
+
+def _normalize(text) -> str:
+    return " ".join(str(text or "").lower().split())
+
+
+def _verdict_key(problem: str, plan: str, tools: list) -> str:
+    tool_set = sorted(f"{t.name}: {_normalize(t.description)}" for t in tools)
+    payload = "\x00".join([_normalize(problem), _normalize(plan), *tool_set])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 class PlanValidationTool(BaseTool):
@@ -13,30 +32,68 @@ class PlanValidationTool(BaseTool):
     # Use PrivateAttr for non-Pydantic fields (callbacks)
     _get_problem: Callable[[], str] = PrivateAttr()
     _get_tools: Callable[[], list] = PrivateAttr()
+    _on_event: Optional[Callable[[dict], None]] = PrivateAttr(default=None)
 
     def __init__(
         self,
         get_problem: Callable[[], str],
         get_tools: Callable[[], list],
+        on_event: Optional[Callable[[dict], None]] = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
         self._get_problem = get_problem
         self._get_tools = get_tools
+        self._on_event = on_event
+
+    def _log(self, **event):
+        if self._on_event is not None:
+            self._on_event({"event": "plan_validation", **event})
+
+    def _cached_verdict(self, problem: str, plan: str, tools: list):
+        key = _verdict_key(problem, plan, tools)
+        with _verdict_cache_lock:
+            output = _verdict_cache.get(key)
+            if output is not None:
+                _verdict_cache.move_to_end(key)
+        self._log(cache="hit" if output is not None else "miss", key=key[:12])
+        return key, output
+
+    @staticmethod
+    def _store_verdict(key: str, output: dict):
+        with _verdict_cache_lock:
+            _verdict_cache[key] = output
+            while len(_verdict_cache) > VERDICT_CACHE_SIZE:
+                _verdict_cache.popitem(last=False)
+
+    @staticmethod
+    def _format(output: dict) -> str:
+        return (
+            "✅ Valid plan."
+            if output.get("valid")
+            else f"❌ Invalid plan:\n{output.get('comment', 'No comment provided')}"
+        )
 
     def _run(self, plan: str) -> str:
         try:
-            validator = PlanValidatorAgent()
-            output = validator.validate(
-                problem=self._get_problem(), tools=self._get_tools(), plan=plan
-            )
-            return (
-                "✅ Valid plan."
-                if output.get("valid")
-                else f"❌ Invalid plan:\n{output.get('comment', 'No comment provided')}"
-            )
+            problem = self._get_problem()
+            tools = self._get_tools()
+            key, output = self._cached_verdict(problem, plan, tools)
+            if output is None:
+                output = get_plan_validator().validate(problem=problem, tools=tools, plan=plan)
+                self._store_verdict(key, output)
+            return self._format(output)
         except Exception as e:
             return f"❌ Error during validation: {str(e)}"
 
     async def _arun(self, plan: str) -> str:
-        return self._run(plan)
+        try:
+            problem = self._get_problem()
+            tools = self._get_tools()
+            key, output = self._cached_verdict(problem, plan, tools)
+            if output is None:
+                output = await get_plan_validator().avalidate(problem=problem, tools=tools, plan=plan)
+                self._store_verdict(key, output)
+            return self._format(output)
+        except Exception as e:
+            return f"❌ Error during validation: {str(e)}"
@@ -2,13 +2,171 @@ from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.tools import BaseTool
 import os
+import hashlib
+import shutil
+import threading
 import yaml
+from collections import OrderedDict
+from typing import List
 from langchain.schema import Document
 
-from paths import DATA_PATH
+from paths import DATA_PATH, RAG_INDEX_PATH
 
 THRESHOLD = 1.25
 TOP_K = 5
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Process-wide registry: the embedding model and the column index are built once and
+# shared by every RAGTool, whichever agent or thread created it.
+_embeddings = {}
+_vectorstores = {}
+# `index_key` of each loaded index, which names it in the query cache
+_index_keys = {}
+_registry_lock = threading.Lock()
+
+# LRU of retrieval results keyed by (index key, normalized query text)
+QUERY_CACHE_SIZE = 1024
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+_query_cache_stats = {"hits": 0, "misses": 0}
+
+
+def get_embeddings(model_name: str = MODEL_NAME) -> HuggingFaceEmbeddings:
+    if model_name not in _embeddings:
+        with _registry_lock:
+            if model_name not in _embeddings:
+                _embeddings[model_name] = HuggingFaceEmbeddings(model_name=model_name)
+    return _embeddings[model_name]
+
+
+def _documentation_path() -> str:
+    return os.path.join(DATA_PATH, "..", "data_documentation.yaml")
+
+
+def index_key(model_name: str = MODEL_NAME) -> str:
+    """Content address of the column index: changes with the documentation or the model."""
+    digest = hashlib.sha256()
+    with open(_documentation_path(), "rb") as f:
+        digest.update(f.read())
+    digest.update(model_name.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def load_column_documents() -> list:
+    # Load YAML file
+    with open(_documentation_path()) as f:
+        data = yaml.safe_load(f)
+
+    # Create LangChain documents from YAML
+    docs = []
+    for column in data["columns"]:
+        # Create metadata with all column attributes
+        metadata = {"name": column, "data_type":data['columns'][column]["data_type"]}
+
+        # Include both name and description in the content for better search
+        description = data['columns'][column].get("description", "")
+        data_type = data['columns'][column].get("data_type", "")
+        additional_notes = data['columns'][column].get("additional_notes", "")
+        content = (
+            f"Column: {column}\n"
+            f"Description: {description}\n"
+            f"Data Type: {data_type}"
+        )
+        if additional_notes:
+            content += f"\nAdditional notes: {additional_notes}"
+
+        doc = Document(page_content=content, metadata=metadata)
+        docs.append(doc)
+    return docs
+
+
+def _dir_stamp(path: str):
+    """Identifies one version of a directory: replacing it changes the inode."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _load_or_build_index(key: str, embeddings: HuggingFaceEmbeddings) -> FAISS:
+    index_dir = os.path.join(RAG_INDEX_PATH, key)
+    if os.path.exists(os.path.join(index_dir, "index.faiss")):
+        try:
+            # Written by this process family only, so deserializing the docstore is safe
+            return FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+        except Exception as e:
+            print(f"⚠️ Could not load the saved column index, rebuilding it: {e}")
+    # A directory that is still here could not be loaded (partial or corrupt)
+    unusable = _dir_stamp(index_dir)
+    vectorstore = FAISS.from_documents(load_column_documents(), embeddings)
+    tmp_dir = f"{index_dir}.{os.getpid()}.tmp"
+    try:
+        vectorstore.save_local(tmp_dir)
+        current = _dir_stamp(index_dir)
+        if current is not None and current != unusable:
+            # Another process saved the index meanwhile; keep it, it may be loading it right now
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return vectorstore
+        if current is not None:
+            # Still the directory that failed to load, the replace needs it gone
+            shutil.rmtree(index_dir)
+        os.replace(tmp_dir, index_dir)
+    except OSError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if _dir_stamp(index_dir) in (None, unusable):
+            print(f"⚠️ Could not save the column index, it will be rebuilt next start: {e}")
+    return vectorstore
+
+
+def get_column_vectorstore(model_name: str = MODEL_NAME) -> FAISS:
+    """
+    Returns the FAISS index of the column documentation. It is loaded from the on-disk
+    copy matching `index_key` when there is one and built (then saved) otherwise.
+    """
+    if model_name not in _vectorstores:
+        embeddings = get_embeddings(model_name)
+        with _registry_lock:
+            if model_name not in _vectorstores:
+                key = index_key(model_name)
+                _vectorstores[model_name] = _load_or_build_index(key, embeddings)
+                _index_keys[model_name] = key
+    return _vectorstores[model_name]
+
+
+def normalize_query(query_text: str) -> str:
+    """
+    Lower-cases the query and drops the spacing/punctuation differences between phrasings.
+    Only used as the cache key: the model embeds the original query.
+    """
+    return " ".join(query_text.lower().split()).strip(" ?.!'\"")
+
+
+def query_cache_stats() -> dict:
+    with _query_cache_lock:
+        return {**_query_cache_stats, "entries": len(_query_cache)}
+
+
+def _format_results(results) -> list:
+    # Format results with more information
+    formatted_results = []
+    for doc, score in results:
+        # if score <= THRESHOLD:
+            result_entry = {
+                "column": doc.metadata["name"],
+                "description": doc.page_content.split("\nDescription: ")[1].split(
+                    "\n"
+                )[0],
+                "data_type": doc.metadata["data_type"],
+                "score": float(score),
+            }
+            formatted_results.append(result_entry)
+    return formatted_results
+
+
+def warm_up(model_name: str = MODEL_NAME):
+    """Loads the embedding model and builds the column index ahead of the first question."""
+    get_column_vectorstore(model_name)
 
 
 class RAGTool(BaseTool):
@@ -28,65 +186,64 @@ class RAGTool(BaseTool):
         "\n"
         "This helps the tool better retrieve relevant columns based on the structured documentation."
     )
-    model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    model_name: str = MODEL_NAME
     vectorstore: FAISS = None
-    data_embeddings: HuggingFaceEmbeddings = None
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.data_embeddings = HuggingFaceEmbeddings(model_name=self.model_name)
-
-        # Load YAML file
-        yaml_file_path = os.path.join(DATA_PATH, "..", "data_documentation.yaml")
-        with open(yaml_file_path) as f:
-            data = yaml.safe_load(f)
-
-        # Create LangChain documents from YAML
-        docs = []
-        for column in data["columns"]:
-            # Create metadata with all column attributes
-            metadata = {"name": column, "data_type":data['columns'][column]["data_type"]}
-
-            # Include both name and description in the content for better search
-            description = data['columns'][column].get("description", "")
-            data_type = data['columns'][column].get("data_type", "")
-            additional_notes = data['columns'][column].get("additional_notes", "")
-            content = (
-                f"Column: {column}\n"
-                f"Description: {description}\n"
-                f"Data Type: {data_type}"
-            )
-            if additional_notes:
-                content += f"\nAdditional notes: {additional_notes}"
-
-            doc = Document(page_content=content, metadata=metadata)
-            docs.append(doc)
-
-        self.vectorstore = FAISS.from_documents(docs, self.data_embeddings)
+
+    def _vectorstore(self) -> FAISS:
+        return self.vectorstore if self.vectorstore is not None else get_column_vectorstore(self.model_name)
+
+    def _index_name(self):
+        """Names the shared index in the query cache; an index passed to the tool is not cached."""
+        if self.vectorstore is not None:
+            return None
+        return _index_keys.get(self.model_name)
 
     def _run(self, query_text: str):
-        if not self.vectorstore:
-            raise ValueError("Vectorstore is not created. Please load documents first.")
-
-        # Get documents with their similarity scores
-        results = self.vectorstore.similarity_search_with_score(query_text, k=TOP_K)
-
-        # Format results with more information
-        formatted_results = []
-        for doc, score in results:
-            # if score <= THRESHOLD:
-                result_entry = {
-                    "column": doc.metadata["name"],
-                    "description": doc.page_content.split("\nDescription: ")[1].split(
-                        "\n"
-                    )[0],
-                    "data_type": doc.metadata["data_type"],
-                    "score": float(score),
-                }
-                formatted_results.append(result_entry)
-
-        return (
-            formatted_results
-            if formatted_results
-            else "No relevant columns found matching your query."
-        )
+        return self.batch_run([query_text])[0]
+
+    def batch_run(self, queries: List[str]) -> list:
+        """
+        Resolves many queries at once. The distinct queries missing from the query cache
+        are embedded together, in their original wording, in a single model forward pass
+        before searching the column index.
+
+        Returns:
+            list: One result per query, in the same order as `queries`.
+        """
+        vectorstore = self._vectorstore()
+        index_name = self._index_name()
+        keys = [(index_name, normalize_query(query)) for query in queries]
+        results = {}
+        if index_name is not None:
+            with _query_cache_lock:
+                for key in keys:
+                    if key in _query_cache:
+                        _query_cache.move_to_end(key)
+                        results[key] = _query_cache[key]
+                        _query_cache_stats["hits"] += 1
+
+        # The first phrasing of each missing key is the one embedded
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key not in results:
+                missing.setdefault(key, query)
+        if missing:
+            with _query_cache_lock:
+                _query_cache_stats["misses"] += len(missing)
+            # One forward pass for every missing query; for this (symmetric) MiniLM model
+            # embed_documents gives the same vectors as embed_query
+            vectors = vectorstore.embeddings.embed_documents(list(missing.values()))
+            for key, vector in zip(missing, vectors):
+                # Get documents with their similarity scores
+                matches = vectorstore.similarity_search_with_score_by_vector(vector, k=TOP_K)
+                results[key] = _format_results(matches)
+                if index_name is not None:
+                    with _query_cache_lock:
+                        _query_cache[key] = results[key]
+                        while len(_query_cache) > QUERY_CACHE_SIZE:
+                            _query_cache.popitem(last=False)
+
+        return [
+            [dict(entry) for entry in results[key]] if results[key] else "No relevant columns found matching your query."
+            for key in keys
+        ]
@@ -0,0 +1,295 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+
+from tools.columnar_store import DATE_FORMAT, normalize_date, list_day_files
+from tools.markdown_format import markdown_table
+from tools.data_cache import fingerprint
+from tools.data_loader_tool import loadData, loadAggregates
+
+REPORT_CACHE_SIZE = int(os.getenv("SMARTSCM_REPORT_CACHE_SIZE", 32))
+# Pins "today" of the reports, e.g. to the last day of the sample data
+REPORT_AS_OF = os.getenv("SMARTSCM_REPORT_AS_OF") or None
+REPORT_NARRATION = os.getenv("SMARTSCM_REPORT_NARRATION", "0") == "1"
+CUSTOMER_WINDOW_DAYS = 30
+STATUSES = ["Pending", "In Transit", "Completed"]
+ORDER_TYPES = ["Standard", "Express"]
+
+NARRATION_PROMPT = """You are a supply chain analyst. Below is a report computed from the order data.
+Write a short executive summary (3 to 5 bullet points) of what stands out.
+Only use numbers that appear in the report, do not compute or invent new ones.
+
+{report}
+"""
+
+
+def _money(value) -> str:
+    return f"{value:,.2f}"
+
+
+def _counts(series: pd.Series, expected) -> pd.Series:
+    counts = series.astype(str).value_counts()
+    return counts.reindex(list(expected) + [v for v in counts.index if v not in expected], fill_value=0)
+
+
+def _top_products(df: pd.DataFrame, by: list, n: int) -> pd.Series:
+    """
+    The `n` products with the largest quantity per group of `by`, joined as "name (qty)".
+    `df` holds orders or the cube rows of a product grouping set: both are summed per group.
+    """
+    quantities = (
+        df.groupby(by + ["ProductName"], observed=True)["Quantity"].sum()
+        .reset_index()
+        .sort_values(by + ["Quantity"], ascending=[True] * len(by) + [False], kind="stable")
+    )
+    top = quantities.groupby(by, observed=True).head(n)
+    labels = top["ProductName"].astype(str) + " (" + top["Quantity"].astype(int).astype(str) + ")"
+    return labels.groupby([top[column] for column in by], observed=True).agg(", ".join)
+
+
+def _crosstab(df: pd.DataFrame, index: str, column: str, expected, values: str = None) -> pd.DataFrame:
+    """Counts rows per `index` and `column`, or sums `values` (e.g. the cube's OrderCount)."""
+    if values is None:
+        table = pd.crosstab(df[index].astype(str), df[column].astype(str))
+    else:
+        table = pd.crosstab(df[index].astype(str), df[column].astype(str), values=df[values], aggfunc="sum")
+        table = table.fillna(0).astype(int)
+    return table.reindex(columns=list(expected) + [c for c in table.columns if c not in expected], fill_value=0)
+
+
+def _grouping(cube: pd.DataFrame, name: str) -> pd.DataFrame:
+    return cube[cube["Grouping"] == name]
+
+
+def daily_orders_report(df: pd.DataFrame, as_of: pd.Timestamp) -> str:
+    day = df[df["OrderDate"] == as_of]
+    title = f"## 📅 Daily orders report, {as_of:%Y-%m-%d}"
+    if day.empty:
+        return f"{title}\n\nNo orders with OrderDate = {as_of:%Y-%m-%d}."
+    status = _counts(day["Status"], STATUSES)
+    types = _counts(day["OrderType"], ORDER_TYPES)
+    top = (
+        day.groupby("ProductName", observed=True)["Quantity"].sum()
+        .nlargest(5).rename("Quantity").reset_index()
+    )
+    pending = day.loc[day["Status"] == "Pending", ["OrderID", "CustomerName", "ProductName", "TotalAmount"]]
+    revenue = day["TotalAmount"].sum()
+    lines = [
+        title,
+        "",
+        f"- **Orders**: {len(day)}",
+        f"- **Revenue**: {_money(revenue)}",
+        f"- **Average order value**: {_money(revenue / len(day))}",
+        "- **By status**: " + ", ".join(f"{name}: {count}" for name, count in status.items()),
+        "- **By order type**: " + ", ".join(f"{name}: {count}" for name, count in types.items()),
+        "",
+        "### Top 5 products by quantity",
+        markdown_table(top),
+        "",
+        "### Pending orders",
+        markdown_table(pending) if not pending.empty else "No pending orders.",
+    ]
+    return "\n".join(lines)
+
+
+def customer_analysis_report(df: pd.DataFrame, as_of: pd.Timestamp) -> str:
+    start = as_of - pd.Timedelta(days=CUSTOMER_WINDOW_DAYS - 1)
+    window = df[(df["OrderDate"] >= start) & (df["OrderDate"] <= as_of)]
+    title = f"## 📦 Customer analysis, {start:%Y-%m-%d} to {as_of:%Y-%m-%d}"
+    if window.empty:
+        return f"{title}\n\nNo orders in the last {CUSTOMER_WINDOW_DAYS} days."
+    summary = window.groupby("CustomerName", observed=True).agg(
+        Orders=("OrderID", "size"),
+        TotalAmount=("TotalAmount", "sum"),
+        AverageOrder=("TotalAmount", "mean"),
+        Quantity=("Quantity", "sum"),
+        FirstOrder=("OrderDate", "min"),
+        LastOrder=("OrderDate", "max"),
+    )
+    summary.index = summary.index.astype(str)
+    types = _crosstab(window, "CustomerName", "OrderType", ORDER_TYPES)
+    summary["Express %"] = (100 * types["Express"] / summary["Orders"]).round(1)
+    summary["Standard %"] = (100 * types["Standard"] / summary["Orders"]).round(1)
+    summary = summary.join(_crosstab(window, "CustomerName", "Status", STATUSES))
+    summary["Top products"] = _top_products(window, ["CustomerName"], 3).rename(index=str)
+    summary = summary.sort_values("TotalAmount", ascending=False)
+    summary["TotalAmount"] = summary["TotalAmount"].map(_money)
+    summary["AverageOrder"] = summary["AverageOrder"].map(_money)
+    summary["FirstOrder"] = summary["FirstOrder"].dt.strftime("%Y-%m-%d")
+    summary["LastOrder"] = summary["LastOrder"].dt.strftime("%Y-%m-%d")
+    return "\n".join([
+        title,
+        "",
+        f"{len(summary)} customers placed {len(window)} orders.",
+        "",
+        markdown_table(summary.rename_axis("Customer"), index=True),
+    ])
+
+
+def regional_overview_report(cube: pd.DataFrame, as_of: Optional[pd.Timestamp] = None) -> str:
+    """Built from the daily rollups of every day (see `aggregate_cube`) instead of the orders."""
+    title = "## 🌍 Regional overview"
+    region = _grouping(cube, "region")
+    if region.empty:
+        return f"{title}\n\nNo orders."
+    regions = region.groupby("Region", observed=True).agg(
+        Orders=("OrderCount", "sum"),
+        Revenue=("TotalAmount", "sum"),
+    )
+    regions["AverageOrder"] = regions["Revenue"] / regions["Orders"]
+    regions["Customers"] = _grouping(cube, "region_customer").groupby("Region", observed=True)["CustomerName"].nunique()
+    regions["Customers"] = regions["Customers"].fillna(0).astype(int)
+    regions.index = regions.index.astype(str)
+    status = _grouping(cube, "region_status")
+    regions = regions.join(_crosstab(status, "Region", "OrderType", ORDER_TYPES, values="OrderCount"))
+    regions = regions.join(_crosstab(status, "Region", "Status", STATUSES, values="OrderCount"))
+    regions["Top products"] = _top_products(_grouping(cube, "region_product"), ["Region"], 3).rename(index=str)
+    cities = (
+        region.groupby(["Region", "City"], observed=True)
+        .agg(Orders=("OrderCount", "sum"), Revenue=("TotalAmount", "sum"))
+        .reset_index()
+        .sort_values(["Region", "Orders"], ascending=[True, False], kind="stable")
+    )
+    most_active = cities.groupby("Region", observed=True).head(3)
+    regions["Most active cities"] = (
+        (most_active["City"].astype(str) + " (" + most_active["Orders"].astype(str) + ")")
+        .groupby(most_active["Region"].astype(str)).agg(", ".join)
+    )
+    regions = regions.sort_values("Revenue", ascending=False)
+    regions["Revenue"] = regions["Revenue"].map(_money)
+    regions["AverageOrder"] = regions["AverageOrder"].map(_money)
+    cities["Revenue"] = cities["Revenue"].map(_money)
+    return "\n".join([
+        title,
+        "",
+        markdown_table(regions.rename_axis("Region"), index=True),
+        "",
+        "### By city",
+        markdown_table(cities),
+    ])
+
+
+REPORTS = {
+    "daily_orders": daily_orders_report,
+    "customer_analysis": customer_analysis_report,
+    "regional_overview": regional_overview_report,
+}
+# What each report reads: the orders of the day files of a range, or the daily rollups of every day
+REPORT_INPUTS = {
+    "daily_orders": ("orders", lambda as_of: (as_of, as_of)),
+    "customer_analysis": ("orders", lambda as_of: (as_of - pd.Timedelta(days=CUSTOMER_WINDOW_DAYS - 1), as_of)),
+    "regional_overview": ("aggregates", lambda as_of: (None, None)),
+}
+
+
+class ReportEngine:
+    """
+    Computes the predefined reports directly with pandas.
+
+    The reports have fixed content, so they do not need the orchestrator, the plan
+    validator or the pandas agent. Each report only reads what it needs (see
+    `REPORT_INPUTS`): the day files of its range through `loadData` and the DataFrame
+    cache, or the cached daily rollups through `loadAggregates`. Like `data_loader`,
+    every row of the day files counts, so a report and a question about the same range
+    give the same numbers. Results are cached per report, reference date and mtime/size
+    of the day files read: the cache is hit until one of them is added or changed. An LLM
+    is only used, on request, to narrate the computed numbers.
+    """
+
+    def __init__(self, cache_size: int = REPORT_CACHE_SIZE, load_orders=loadData, load_aggregates=loadAggregates):
+        self.cache_size = cache_size
+        self._load_orders = load_orders
+        self._load_aggregates = load_aggregates
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _cached(self, key, compute):
+        value = self._lookup(key)
+        if value is not None:
+            return value
+        value = compute()
+        self._store_value(key, value)
+        return value
+
+    def _store_value(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _dates(start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> tuple:
+        return tuple(day.strftime(DATE_FORMAT) if day is not None else None for day in (start, end))
+
+    def run(self, name: str, as_of: Optional[str] = REPORT_AS_OF, narrate: bool = REPORT_NARRATION) -> dict:
+        """
+        Returns {"name", "markdown", "narration", "data_version", "seconds"} for one of `REPORTS`.
+
+        Args:
+            name: Key of the report in `REPORTS`.
+            as_of: Reference date ("today") as YYYY-MM-DD, the current date when None.
+            narrate: Add an LLM-written summary of the computed numbers.
+
+        Raises:
+            KeyError: If the report does not exist.
+        """
+        report = REPORTS[name]
+        kind, window = REPORT_INPUTS[name]
+        as_of = pd.Timestamp(normalize_date(as_of) if as_of else date.today())
+        started = time.perf_counter()
+        start, end = self._dates(*window(as_of))
+        # Read before loading: a file changed meanwhile only makes the next run recompute
+        files = fingerprint(list_day_files(start, end))
+        version = hashlib.sha256(repr(sorted(files.items())).encode("utf-8")).hexdigest()[:12]
+        key = (name, as_of, version)
+        markdown = self._lookup(key)
+        if markdown is None:
+            if kind == "aggregates":
+                data = self._load_aggregates(start, end)
+            else:
+                data = self._load_orders(start, end) if files else pd.DataFrame()
+                if data.empty:
+                    # The reports filter on OrderDate before checking for orders
+                    data = pd.DataFrame(columns=["OrderDate"])
+            markdown = report(data, as_of)
+            self._store_value(key, markdown)
+        narration = self._cached(key + ("narration",), lambda: self.narrate(markdown)) if narrate else None
+        return {
+            "name": name,
+            "markdown": markdown,
+            "narration": narration,
+            "data_version": key[2],
+            "seconds": time.perf_counter() - started,
+        }
+
+    @staticmethod
+    def narrate(markdown: str) -> str:
+        from agents.llm_factory import get_llm
+
+        return get_llm(max_tokens=1024).invoke(NARRATION_PROMPT.format(report=markdown)).content
+
+
+_report_engine = None
+_report_engine_lock = threading.Lock()
+
+
+def get_report_engine() -> ReportEngine:
+    global _report_engine
+    if _report_engine is None:
+        with _report_engine_lock:
+            if _report_engine is None:
+                _report_engine = ReportEngine()
+    return _report_engine